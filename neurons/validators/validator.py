@@ -33,6 +33,7 @@ from webgenie.constants import (
 )
 from webgenie.protocol import WebgenieTextSynapse, WebgenieImageSynapse
 from webgenie.rewards.lighthouse_reward import start_lighthouse_server_thread, stop_lighthouse_server
+from webgenie.rewards.scoring_pool import start_scoring_pool, stop_scoring_pool
 from webgenie.storage import (
     send_challenge_to_stats_collector,
     submit_results,
@@ -353,6 +354,9 @@ class Validator(BaseValidatorNeuron):
             bt.logging.info("Starting validator in background thread")
             self.is_running = True
             self.should_exit = False
+
+            # Start the scoring workers before the threads, they stay warm for every task
+            start_scoring_pool()
             
             #self.synthensize_task_thread = threading.Thread(target=self.synthensize_task_loop, daemon=True)
             self.query_miners_thread = threading.Thread(target=self.query_miners_loop, daemon=True)
@@ -378,6 +382,7 @@ class Validator(BaseValidatorNeuron):
             #self.score_thread.join(5)
             self.sync_thread.join(5)
             stop_lighthouse_server()
+            stop_scoring_pool()
 
             #self.synthensize_task_thread = None
             self.query_miners_thread = None
@@ -0,0 +1,92 @@
+import sys
+import os
+import time
+import numpy as np
+from PIL import Image
+from skimage import color
+from dotenv import load_dotenv, find_dotenv
+def init_test():
+    parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    sys.path.append(parent_dir)
+    load_dotenv(find_dotenv(filename=".env.validator"))
+
+init_test()
+
+
+from webgenie.rewards.visual_reward.common.sift import (
+    extract_sift_from_roi,
+    match_sift_features,
+    sift_match_cache,
+)
+
+# Usage: python benchmark_sift_matcher.py [image_path] [number_of_regions]
+# Compares the sift scores of the kd-tree matcher with the exact hungarian matcher, on regions of
+# an image and of a slightly altered copy of it, like the elements of a miner and an original page.
+
+
+def load_images(image_path):
+    with Image.open(image_path) as img:
+        # Screenshots are 1280px wide
+        img = img.convert("RGB")
+        image = np.array(img.resize((1280, img.height * 1280 // img.width)))
+    rng = np.random.default_rng(0)
+    altered = np.clip(image.astype(np.int16) + rng.integers(-1, 2, image.shape) * (rng.random(image.shape) < 0.01), 0, 255).astype(np.uint8)
+    return color.rgb2gray(image), color.rgb2gray(altered)
+
+
+def random_regions(shape, count, rng):
+    height, width = shape
+    regions = []
+    for _ in range(count):
+        w = int(rng.integers(32, 320))
+        h = int(rng.integers(24, 160))
+        x = int(rng.integers(0, width - w))
+        y = int(rng.integers(0, height - h))
+        regions.append((x, y, w, h))
+    return regions
+
+
+def extract(gray_image, roi):
+    try:
+        return extract_sift_from_roi(gray_image, roi)
+    except Exception:
+        return None, None
+
+
+def benchmark_sift_matcher(image_path, count=40):
+    gray_image, altered_gray_image = load_images(image_path)
+    rng = np.random.default_rng(0)
+    regions = random_regions(gray_image.shape, count, rng)
+    original_features = [extract(gray_image, roi) for roi in regions]
+    # Same regions shifted by a few pixels in the altered image, and unrelated regions
+    predicted_features = [
+        extract(altered_gray_image, (x + int(rng.integers(-2, 3)), y + int(rng.integers(-2, 3)), w, h))
+        for x, y, w, h in regions
+    ] + [extract(altered_gray_image, roi) for roi in random_regions(gray_image.shape, count, rng)]
+    pairs = [
+        (predicted, original)
+        for predicted in predicted_features
+        for original in original_features
+        if predicted[1] is not None and original[1] is not None
+    ]
+    print(f"{len(pairs)} pairs of regions")
+
+    scores = {}
+    for matcher in ["hungarian", "kdtree"]:
+        sift_match_cache.clear()
+        start_time = time.time()
+        scores[matcher] = np.array([
+            match_sift_features(kp1, desc1, kp2, desc2, matcher=matcher)
+            for (kp1, desc1), (kp2, desc2) in pairs
+        ])
+        print(f"{matcher}: {time.time() - start_time:.2f}s, mean score {scores[matcher].mean():.4f}")
+
+    diffs = np.abs(scores["kdtree"] - scores["hungarian"])
+    print(f"kdtree vs hungarian: max abs diff {diffs.max():.4f}, mean abs diff {diffs.mean():.4f}")
+
+
+if __name__ == "__main__":
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+    image_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(data_dir, "image_techcompany.jpg")
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    benchmark_sift_matcher(image_path, count)
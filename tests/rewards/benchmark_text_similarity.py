@@ -0,0 +1,67 @@
+import sys
+import os
+import glob
+import time
+import numpy as np
+from bs4 import BeautifulSoup
+from dotenv import load_dotenv, find_dotenv
+def init_test():
+    parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    sys.path.append(parent_dir)
+    load_dotenv(find_dotenv(filename=".env.validator"))
+
+init_test()
+
+
+from webgenie.rewards.visual_reward.common.text_similarity import (
+    TEXT_SIMILARITY_BACKENDS,
+    unique_ratio_matrix,
+)
+
+# Usage: python benchmark_text_similarity.py [miner_page.html ...]
+# Compares the texts of every pair of pages with each text similarity backend.
+
+
+def extract_texts(html_path):
+    with open(html_path, "r") as f:
+        soup = BeautifulSoup(f.read(), "html.parser")
+    body = soup.body or soup
+    # Leaf elements, like the text elements of the visual reward
+    return [
+        element.get_text().strip()
+        for element in body.find_all(True)
+        if not element.find_all(True)
+    ]
+
+
+def benchmark_text_similarity(html_paths, repeat=3):
+    pages = [extract_texts(html_path) for html_path in html_paths]
+    pairs = [(pages[i], pages[j]) for i in range(len(pages)) for j in range(len(pages))]
+    print(f"{len(pages)} pages, {sum(len(texts) for texts in pages)} texts, {len(pairs)} page pairs")
+
+    results = {}
+    for name, backend_class in TEXT_SIMILARITY_BACKENDS.items():
+        try:
+            backend = backend_class()
+        except ImportError as e:
+            print(f"{name}: not available ({e})")
+            continue
+        start_time = time.time()
+        for _ in range(repeat):
+            matrices = [unique_ratio_matrix(texts1, texts2, backend) for texts1, texts2 in pairs]
+        elapsed = (time.time() - start_time) / repeat
+        results[name] = matrices
+        print(f"{name}: {elapsed * 1000:.2f} ms per run")
+
+    reference = results.get("difflib")
+    for name, matrices in results.items():
+        if name == "difflib" or not matrices:
+            continue
+        diffs = np.concatenate([np.abs(a - b).ravel() for a, b in zip(matrices, reference)])
+        print(f"{name} vs difflib: max abs diff {diffs.max():.4f}, mean abs diff {diffs.mean():.4f}")
+
+
+if __name__ == "__main__":
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+    html_paths = sys.argv[1:] or sorted(glob.glob(os.path.join(data_dir, "*.html")))
+    benchmark_text_similarity(html_paths)
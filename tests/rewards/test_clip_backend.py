@@ -0,0 +1,56 @@
+import sys
+import os
+import numpy as np
+import pytest
+from PIL import Image
+from dotenv import load_dotenv, find_dotenv
+def init_test():
+    parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    sys.path.append(parent_dir)
+    load_dotenv(find_dotenv(filename=".env.validator"))
+
+init_test()
+
+
+import torch
+from webgenie.rewards.visual_reward.high_level_matching_score.clip_model import (
+    OnnxImageEncoder,
+    TorchImageEncoder,
+    get_clip_model,
+    rescale,
+)
+
+# Max difference between the clip scores of the torch and the int8 onnx encoders
+CLIP_SCORE_TOLERANCE = 0.03
+
+
+def load_test_images():
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+    with Image.open(os.path.join(data_dir, "image_techcompany.jpg")) as img:
+        image = np.array(img.convert("RGB"))
+    rng = np.random.default_rng(0)
+    noisy = np.clip(image.astype(np.int16) + rng.integers(-20, 20, image.shape), 0, 255).astype(np.uint8)
+    return [image, image[:, ::-1], image[: image.shape[0] // 2], noisy, np.full_like(image, 255)]
+
+
+def test_onnx_encoder_matches_torch():
+    # The onnx backend is optional, its packages are not dependencies of the validator
+    pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    model, preprocess, _ = get_clip_model()
+    images = load_test_images()
+    batch = torch.stack([preprocess(rescale(image)) for image in images])
+
+    torch_embeddings = TorchImageEncoder(model)(batch)
+    onnx_embeddings = OnnxImageEncoder(model)(batch)
+
+    torch_scores = torch_embeddings[1:] @ torch_embeddings[0]
+    onnx_scores = onnx_embeddings[1:] @ onnx_embeddings[0]
+    print(f"torch scores: {torch_scores}")
+    print(f"onnx scores: {onnx_scores}")
+    print(f"cosine between backends: {np.sum(torch_embeddings * onnx_embeddings, axis=-1)}")
+    assert np.max(np.abs(torch_scores - onnx_scores)) < CLIP_SCORE_TOLERANCE
+
+
+if __name__ == "__main__":
+    test_onnx_encoder_matches_torch()
@@ -0,0 +1,55 @@
+import sys
+import os
+import numpy as np
+from PIL import Image, ImageDraw
+from dotenv import load_dotenv, find_dotenv
+def init_test():
+    parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    sys.path.append(parent_dir)
+    load_dotenv(find_dotenv(filename=".env.validator"))
+
+init_test()
+
+
+from webgenie.rewards.visual_reward.common.prefilter import prefilter_renders
+from webgenie.rewards.visual_reward.common.render_session import RenderResult
+
+# Usage: python test_prefilter.py
+# Runs the prefilter of the visual reward on variants of the sample screenshot, the plausible ones
+# should pass and the broken ones should be rejected.
+
+
+def screenshot_variants(image):
+    error_page = Image.new("RGB", (image.shape[1], 960), "white")
+    ImageDraw.Draw(error_page).text((10, 10), "Internal Server Error", fill="black")
+    return {
+        "same": (image, True),
+        "shifted": (np.roll(image, 40, axis=0), True),
+        "half": (image[: image.shape[0] // 2], True),
+        "mirrored": (image[:, ::-1], True),
+        "blank": (np.full((960, image.shape[1], 3), 255, dtype=np.uint8), False),
+        "error page": (np.array(error_page), False),
+        "inverted": (255 - image, False),
+    }
+
+
+def test_prefilter():
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+    with Image.open(os.path.join(data_dir, "image_techcompany.jpg")) as img:
+        img = img.convert("RGB")
+        image = np.array(img.resize((1280, img.height * 1280 // img.width)))
+
+    variants = screenshot_variants(image)
+    original_render = RenderResult(html_path="original", screenshot=image)
+    predict_renders = [
+        RenderResult(html_path=name, screenshot=np.ascontiguousarray(screenshot))
+        for name, (screenshot, _) in variants.items()
+    ]
+    plausible = prefilter_renders(predict_renders, original_render)
+    for (name, (_, expected)), result in zip(variants.items(), plausible):
+        print(f"{name}: {'plausible' if result else 'rejected'}")
+        assert result == expected, f"{name} should be {'plausible' if expected else 'rejected'}"
+
+
+if __name__ == "__main__":
+    test_prefilter()
@@ -12,13 +12,9 @@ init_test()
 
 
 from webgenie.rewards.visual_reward.common.browser import start_browser, stop_browser
-from webgenie.rewards.visual_reward.common.extract_html_elements import extract_html_elements
-from webgenie.rewards.visual_reward.low_level_matching_score.text_matching_score import calculate_text_matching_similarity
-from webgenie.rewards.visual_reward.low_level_matching_score.input_matching_score import calculate_input_matching_similarity
-from webgenie.rewards.visual_reward.low_level_matching_score.element_matching_score import calculate_element_matching_similarity
-from webgenie.rewards.visual_reward.high_level_matching_score.clip_matching_score import calculate_clip_score
-from webgenie.rewards.visual_reward.high_level_matching_score.histogram import histogram_matching_score
+from webgenie.rewards.visual_reward.common.render_session import RenderSession
 from webgenie.rewards.visual_reward.high_level_matching_score.high_level_matching_score import high_level_matching_score
+from webgenie.rewards.visual_reward.low_level_matching_score.low_level_matching_score import low_level_matching_score
 
 async def test_text_matching_score():
     await start_browser()
@@ -26,8 +22,11 @@ async def test_text_matching_score():
     start_time = time.time()
     url = "test1.html"
     url_predict = "miner.html"
-    scores = await high_level_matching_score([url_predict], url)
+    original_render = await RenderSession(url).render()
+    predict_render = await RenderSession(url_predict).render()
+    scores = high_level_matching_score([predict_render], original_render)
     print(scores)
+    print(low_level_matching_score([predict_render], original_render))
     print(time.time() - start_time)
     await stop_browser()
 
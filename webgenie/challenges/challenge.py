@@ -1,5 +1,7 @@
+import bittensor as bt
+import hashlib
 import numpy as np
-from typing import List, Optional
+from typing import ClassVar, List, Optional
 from pydantic import BaseModel, Field
 
 from webgenie.challenges.challenge_types import (
@@ -17,44 +19,122 @@ from webgenie.tasks.task import Task
 from webgenie.tasks.solution import Solution
 
 
+# Seo and quality only count for solutions more accurate than this
+ACCURACY_GATE_THRESHOLD = 0.85
+
+
 class Challenge(BaseModel):
     task: Optional[Task] = Field(default=None, description="The task to be solved")
     solutions: List[Solution] = Field(default=[], description="The solutions to the task")
     competition_type: str = Field(default="", description="The type of competition")
     session: int = Field(default=0, description="The session number")
 
+    # The metrics used by the aggregated score, the others are not computed
+    metric_names: ClassVar[List[str]] = [ACCURACY_METRIC_NAME, QUALITY_METRIC_NAME, SEO_METRIC_NAME]
+    # {metric_name: (gate_metric_name, threshold)}, the metric is only computed for the solutions
+    # whose gate metric score is above the threshold, the others score 0
+    metric_gates: ClassVar[dict[str, tuple[str, float]]] = {}
+
     async def calculate_scores(self) -> dict[str, np.ndarray]:
         pass
 
+    async def calculate_metric_scores(self) -> dict[str, np.ndarray]:
+        """
+        Calculate the metric scores of the solutions, scoring each unique html only once.
+        The scores are returned in the order of `self.solutions`.
+        """
+        unique_indices = {}
+        unique_solutions = []
+        solution_indices = []
+        for solution in self.solutions:
+            html_hash = hashlib.sha256(solution.html.encode()).hexdigest()
+            if html_hash not in unique_indices:
+                unique_indices[html_hash] = len(unique_solutions)
+                unique_solutions.append(solution)
+            solution_indices.append(unique_indices[html_hash])
+
+        if len(unique_solutions) < len(self.solutions):
+            bt.logging.info(f"Scoring {len(unique_solutions)} unique solutions out of {len(self.solutions)}")
+
+        scores = await self.calculate_gated_scores(unique_solutions)
+        solution_indices = np.array(solution_indices, dtype=int)
+        return {
+            metric_name: np.asarray(metric_scores)[solution_indices]
+            for metric_name, metric_scores in scores.items()
+        }
+
+
+    async def calculate_gated_scores(self, solutions: List[Solution]) -> dict[str, np.ndarray]:
+        """
+        Calculate the metric scores of the solutions, computing the gate metrics first and
+        the gated metrics only for the solutions which pass their gate.
+        """
+        generator = self.task.generator
+        ungated_metric_names = [metric_name for metric_name in self.metric_names if metric_name not in self.metric_gates]
+        scores = await generator.calculate_scores(self.task, solutions, ungated_metric_names)
+
+        gates = {}
+        for metric_name in self.metric_names:
+            if metric_name in self.metric_gates:
+                gates.setdefault(self.metric_gates[metric_name], []).append(metric_name)
+
+        for (gate_metric_name, threshold), metric_names in gates.items():
+            passed_indices = np.nonzero(np.asarray(scores[gate_metric_name]) > threshold)[0]
+            bt.logging.info(
+                f"{len(passed_indices)} of {len(solutions)} solutions pass the {gate_metric_name} gate of {metric_names}"
+            )
+            for metric_name in metric_names:
+                scores[metric_name] = np.zeros(len(solutions))
+            if len(passed_indices) == 0:
+                continue
+
+            passed_scores = await generator.calculate_scores(
+                self.task,
+                [solutions[i] for i in passed_indices],
+                metric_names,
+            )
+            for metric_name in metric_names:
+                scores[metric_name][passed_indices] = passed_scores[metric_name]
+        return scores
+
 
 class AccuracyChallenge(Challenge):
     competition_type: str = Field(default=ACCURACY_COMPETITION_TYPE, description="The type of competition")
+    metric_names: ClassVar[List[str]] = [ACCURACY_METRIC_NAME, QUALITY_METRIC_NAME]
 
     async def calculate_scores(self) -> dict[str, np.ndarray]:
-        scores = await self.task.generator.calculate_scores(self.task, self.solutions)
+        scores = await self.calculate_metric_scores()
         aggregated_scores = scores[ACCURACY_METRIC_NAME] * 0.9 + scores[QUALITY_METRIC_NAME] * 0.1
         return aggregated_scores, scores
 
 
 class SeoChallenge(Challenge):
     competition_type: str = Field(default=SEO_COMPETITION_TYPE, description="The type of competition")
+    metric_names: ClassVar[List[str]] = [ACCURACY_METRIC_NAME, SEO_METRIC_NAME]
+    metric_gates: ClassVar[dict[str, tuple[str, float]]] = {
+        SEO_METRIC_NAME: (ACCURACY_METRIC_NAME, ACCURACY_GATE_THRESHOLD),
+    }
 
     async def calculate_scores(self) -> dict[str, np.ndarray]:
-        scores = await self.task.generator.calculate_scores(self.task, self.solutions)
+        scores = await self.calculate_metric_scores()
         accuracy_scores = scores[ACCURACY_METRIC_NAME]
         seo_scores = scores[SEO_METRIC_NAME]
-        aggregated_scores = np.where(accuracy_scores > 0.85, seo_scores, 0)
+        aggregated_scores = np.where(accuracy_scores > ACCURACY_GATE_THRESHOLD, seo_scores, 0)
         return aggregated_scores, scores
 
 
 class QualityChallenge(Challenge):
     competition_type: str = Field(default=QUALITY_COMPETITION_TYPE, description="The type of competition")
+    metric_names: ClassVar[List[str]] = [ACCURACY_METRIC_NAME, QUALITY_METRIC_NAME]
+    metric_gates: ClassVar[dict[str, tuple[str, float]]] = {
+        QUALITY_METRIC_NAME: (ACCURACY_METRIC_NAME, ACCURACY_GATE_THRESHOLD),
+    }
 
     async def calculate_scores(self) -> dict[str, np.ndarray]:
-        scores = await self.task.generator.calculate_scores(self.task, self.solutions)
+        scores = await self.calculate_metric_scores()
         accuracy_scores = scores[ACCURACY_METRIC_NAME]
         quality_scores = scores[QUALITY_METRIC_NAME]
-        aggregated_scores = np.where(accuracy_scores > 0.85, quality_scores, 0)
+        aggregated_scores = np.where(accuracy_scores > ACCURACY_GATE_THRESHOLD, quality_scores, 0)
         return aggregated_scores, scores
 
 
@@ -62,7 +142,7 @@ class BalancedChallenge(Challenge):
     competition_type: str = Field(default=BALANCED_COMPETITION_TYPE, description="The type of competition")
 
     async def calculate_scores(self) -> dict[str, np.ndarray]:
-        scores = await self.task.generator.calculate_scores(self.task, self.solutions)
+        scores = await self.calculate_metric_scores()
         accuracy_scores = scores[ACCURACY_METRIC_NAME]
         quality_scores = scores[QUALITY_METRIC_NAME]
         seo_scores = scores[SEO_METRIC_NAME]
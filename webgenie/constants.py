@@ -33,13 +33,31 @@ MAX_DEBUG_IMAGE_STRING_LENGTH = 20 # max debug image string length
 
 PLACE_HOLDER_IMAGE_URL = "https://picsum.photos/seed/picsum/800/600" # place holder image url
 
+# List of allowed patterns for CSS and JavaScript resources
+ALLOWED_RESOURCE_PATTERNS = [
+    r"https?://cdn.jsdelivr.net/npm/tailwindcss@[^/]+/dist/tailwind.min.css",
+    r"https?://stackpath.bootstrapcdn.com/bootstrap/[^/]+/css/bootstrap.min.css",
+    r"https?://code.jquery.com/jquery-[^/]+.min.js",
+    r"https?://stackpath.bootstrapcdn.com/bootstrap/[^/]+/js/bootstrap.bundle.min.js",
+    r"https?://cdnjs.cloudflare.com/ajax/libs/font-awesome/[^/]+/css/font-awesome.min.css",
+    r"https?://fonts.googleapis.com/css2?family=Roboto:wght@300;400;500;700&display=swap",
+]
+
 DEFAULT_LOAD_TIME = 1000 # default load time
 
 GROUND_TRUTH_HTML_LOAD_TIME = 20000 # max page load time
 
 CHROME_HTML_LOAD_TIME = 60000 # miner html load time
 
-JAVASCRIPT_RUNNING_TIME = 1000 # javascript running time
+PAGE_READY_TIMEOUT = int(os.getenv("PAGE_READY_TIMEOUT", 5000)) # max time to wait for a loaded page to become stable
+
+RENDER_VIEWPORT = {"width": 1280, "height": 720} # viewport of the pages used to render htmls
+
+MAX_RENDER_HEIGHT = int(os.getenv("MAX_RENDER_HEIGHT", 1280 * 8)) # max height of a rendered page, taller pages are truncated
+
+RENDER_HEIGHT_MODE = os.getenv("RENDER_HEIGHT_MODE", "clip") # how tall pages are captured, "clip" or "tiled"
+
+RENDER_TILE_HEIGHT = int(os.getenv("RENDER_TILE_HEIGHT", 2048)) # height of a tile in the tiled capture mode
 
 MINER_HTML_LOAD_TIME = 2000 # miner html load time
 
@@ -49,6 +67,46 @@ WORK_DIR = "work" # work dir
 
 LIGHTHOUSE_SERVER_WORK_DIR = f"{WORK_DIR}/lighthouse_server_work" # lighthouse server work dir
 
+ASSET_CACHE_DIR = f"{WORK_DIR}/asset_cache" # cache dir of the allowed cdn assets
+
+RENDER_CACHE_DIR = f"{WORK_DIR}/render_cache" # cache dir of the rendered htmls
+
+RENDER_CACHE_MEMORY_SIZE = int(os.getenv("RENDER_CACHE_MEMORY_SIZE", 512 * 1024 * 1024)) # max bytes of renders kept in memory
+
+RENDER_CACHE_DISK_SIZE = int(os.getenv("RENDER_CACHE_DISK_SIZE", 4 * 1024 * 1024 * 1024)) # max bytes of renders kept on disk
+
+CLIP_MODEL_NAME = "ViT-B/32" # clip model used for the high level visual matching
+
+CLIP_BACKEND = os.getenv("CLIP_BACKEND", "torch") # backend of the clip image encoder, "torch" or "onnx" (int8 quantized onnxruntime)
+
+CLIP_BATCH_SIZE = int(os.getenv("CLIP_BATCH_SIZE", 16)) # number of screenshots encoded by clip at once
+
+CLIP_EMBEDDING_CACHE_SIZE = int(os.getenv("CLIP_EMBEDDING_CACHE_SIZE", 4096)) # number of clip embeddings kept in memory and on disk
+
+CLIP_EMBEDDING_STORE_DIR = os.getenv("CLIP_EMBEDDING_STORE_DIR", f"{WORK_DIR}/clip_embeddings") # dir of the persisted clip embeddings, empty to keep them in memory only
+
+CLIP_ONNX_DIR = f"{WORK_DIR}/clip_onnx" # dir of the exported onnx clip image encoder
+
+TEXT_SIMILARITY_BACKEND = os.getenv("TEXT_SIMILARITY_BACKEND", "difflib") # text similarity of the visual metrics, "difflib" or "rapidfuzz"
+
+ASSIGNMENT_DENSE_LIMIT = int(os.getenv("ASSIGNMENT_DENSE_LIMIT", 256 * 256)) # max pairs of elements matched with a dense cost matrix, larger pages only match nearby candidates
+
+ASSIGNMENT_CANDIDATE_RADIUS = float(os.getenv("ASSIGNMENT_CANDIDATE_RADIUS", 0.2)) # max distance between the scaled bounding boxes of candidate pairs
+
+ASSIGNMENT_MAX_CANDIDATES = int(os.getenv("ASSIGNMENT_MAX_CANDIDATES", 32)) # max candidates of a predicted element, bounds the scoring time of large pages
+
+SIFT_MATCHER = os.getenv("SIFT_MATCHER", "hungarian") # matcher of sift descriptors, "hungarian" (exact) or "kdtree" (nearest neighbour)
+
+SIFT_MATCH_CACHE_SIZE = int(os.getenv("SIFT_MATCH_CACHE_SIZE", 65536)) # number of sift match scores of element pairs kept in memory
+
+VISUAL_PREFILTER = os.getenv("VISUAL_PREFILTER", "False").lower() == "true" # score clearly broken solutions 0 from their screenshot, before the full visual metrics, off until its thresholds are checked on real solutions
+
+VISUAL_PREFILTER_MIN_CONTENT = float(os.getenv("VISUAL_PREFILTER_MIN_CONTENT", 0.005)) # min fraction of the screenshot differing from the background, below it the page is blank
+
+VISUAL_PREFILTER_MIN_HASH_SIMILARITY = float(os.getenv("VISUAL_PREFILTER_MIN_HASH_SIMILARITY", 0.6)) # min perceptual hash similarity to the original, for the layout to be plausible
+
+VISUAL_PREFILTER_MIN_HISTOGRAM_SIMILARITY = float(os.getenv("VISUAL_PREFILTER_MIN_HISTOGRAM_SIMILARITY", 0.5)) # min grayscale histogram similarity to the original, for the colors to be plausible
+
 HTML_EXTENSION = ".html" # html extension
 
 IMAGE_EXTENSION = ".png" # image extension
@@ -99,6 +157,28 @@ NUMBER_OF_CONCURRENT_WORKERS = max(
     )
 )
 
+RENDER_CONCURRENCY = int(os.getenv("RENDER_CONCURRENCY", max(
+    1,
+    min(
+        2 * os.cpu_count() // NUMBER_OF_CONCURRENT_WORKERS,
+        (psutil.virtual_memory().total) // NUMBER_OF_CONCURRENT_WORKERS // (1024 * 1024 * 512)
+    )
+))) # number of pages rendered at the same time by a worker
+
+RENDER_TIMEOUT = int(os.getenv("RENDER_TIMEOUT", 120)) # max seconds to render a single html
+
+SOLUTION_SCORING_TIMEOUT = int(os.getenv("SOLUTION_SCORING_TIMEOUT", 300)) # max seconds of a scoring job of a metric, its solutions score 0 after
+
+VISUAL_SCORING_GROUP_SIZE = int(os.getenv("VISUAL_SCORING_GROUP_SIZE", RENDER_CONCURRENCY)) # max solutions of a visual scoring job, they render in parallel tabs and share clip batches
+
+CLIP_ONNX_THREADS = int(os.getenv("CLIP_ONNX_THREADS", max(1, os.cpu_count() // NUMBER_OF_CONCURRENT_WORKERS))) # intra op threads of the onnx clip encoder in a worker
+
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", 1)) # number of chromium browsers per process
+
+BROWSER_POOL_CONTEXTS = int(os.getenv("BROWSER_POOL_CONTEXTS", -(-RENDER_CONCURRENCY // BROWSER_POOL_SIZE))) # number of browser contexts per browser
+
+BROWSER_CONTEXT_MAX_PAGES = int(os.getenv("BROWSER_CONTEXT_MAX_PAGES", 50)) # pages rendered before a context is recycled
+
 DASHBOARD_BACKEND_URL = os.getenv("DASHBOARD_BACKEND_URL", "http://209.126.9.130:19000") # dashboard backend url
 
 API_TOKEN = os.getenv("API_TOKEN", "api_token") # api token
@@ -7,7 +7,6 @@ from bs4 import BeautifulSoup, Tag, NavigableString
 from collections import Counter
 from duckduckgo_search import DDGS
 from nltk.corpus import brown
-from playwright.async_api import async_playwright
 from urllib.parse import urljoin
 from typing import Optional
 
@@ -15,8 +14,8 @@ from webgenie.datasets.dataset import Dataset, DatasetEntry
 from webgenie.constants import (
     GROUND_TRUTH_HTML_LOAD_TIME, 
     CHROME_HTML_LOAD_TIME,
-    JAVASCRIPT_RUNNING_TIME,
 )
+from webgenie.helpers.browsers import lease_page, load_page
 
 class RandomWebsiteDataset(Dataset):
     def __init__(self , **kwargs):
@@ -51,21 +50,16 @@ class RandomWebsiteDataset(Dataset):
 
     async def get_rendered_html(self, url):
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch()
-                page = await browser.new_page()
-                await page.goto(url, timeout=CHROME_HTML_LOAD_TIME)
-                
-                # Wait for 10 seconds to ensure content loads
-                # await page.wait_for_timeout(GROUND_TRUTH_HTML_LOAD_TIME)
-                
-                await page.wait_for_load_state('networkidle')
-                await page.wait_for_timeout(JAVASCRIPT_RUNNING_TIME)
+            async with lease_page() as page:
+                # Wait until the page is stable, at most GROUND_TRUTH_HTML_LOAD_TIME
+                await load_page(
+                    page, 
+                    url, 
+                    timeout=CHROME_HTML_LOAD_TIME, 
+                    ready_timeout=GROUND_TRUTH_HTML_LOAD_TIME,
+                )
                 
                 rendered_html = await page.content()  # Get the rendered HTML
-                
-                await page.close()
-                await browser.close()
 
                 # Parse the HTML with BeautifulSoup
                 soup = BeautifulSoup(rendered_html, 'html.parser')
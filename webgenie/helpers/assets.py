@@ -0,0 +1,155 @@
+import bittensor as bt
+import hashlib
+import io
+import json
+import os
+import re
+import uuid
+from PIL import Image
+
+from webgenie.constants import (
+    ALLOWED_RESOURCE_PATTERNS,
+    ASSET_CACHE_DIR,
+    PLACE_HOLDER_IMAGE_URL,
+)
+
+
+# The allowed resources and the fonts they load
+CACHEABLE_URL_PATTERNS = ALLOWED_RESOURCE_PATTERNS + [
+    r"https?://fonts.googleapis.com/css2?\?.+",
+    r"https?://fonts.gstatic.com/.+",
+    r"https?://cdnjs.cloudflare.com/ajax/libs/font-awesome/[^/]+/fonts/.+",
+]
+
+PLACE_HOLDER_IMAGE_PATTERN = r"https?://picsum.photos/.+"
+
+# Intercept only network requests, local files are served by the browser
+INTERCEPTED_URL_PATTERN = re.compile(r"^https?://")
+
+
+def is_cacheable_url(url: str) -> bool:
+    return any(re.match(pattern, url) for pattern in CACHEABLE_URL_PATTERNS)
+
+
+def is_place_holder_image_url(url: str) -> bool:
+    return url == PLACE_HOLDER_IMAGE_URL or re.match(PLACE_HOLDER_IMAGE_PATTERN, url) is not None
+
+
+def write_file_atomically(path: str, data: bytes):
+    temp_path = f"{path}.{uuid.uuid4()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+class AssetCache:
+    """
+    On-disk content-addressed cache of the allowed CDN assets.
+    The index maps the sha256 of an url to the sha256 of its content, so the same
+    file served from different urls is stored once.
+    """
+    def __init__(self, cache_dir: str = ASSET_CACHE_DIR):
+        self.index_dir = f"{cache_dir}/index"
+        self.objects_dir = f"{cache_dir}/objects"
+        self.memory = {}
+
+    def _index_path(self, url: str) -> str:
+        return f"{self.index_dir}/{hashlib.sha256(url.encode()).hexdigest()}.json"
+
+    def _object_path(self, digest: str) -> str:
+        return f"{self.objects_dir}/{digest[:2]}/{digest}"
+
+    def get(self, url: str):
+        """
+        Get the (content_type, body) of the url, or None if it is not cached.
+        """
+        if url in self.memory:
+            return self.memory[url]
+        try:
+            with open(self._index_path(url), "r") as f:
+                entry = json.load(f)
+            with open(self._object_path(entry["sha256"]), "rb") as f:
+                body = f.read()
+        except (FileNotFoundError, KeyError, ValueError):
+            return None
+        if hashlib.sha256(body).hexdigest() != entry["sha256"]:
+            bt.logging.warning(f"Corrupted asset cache entry for {url}")
+            return None
+        self.memory[url] = (entry["content_type"], body)
+        return self.memory[url]
+
+    def put(self, url: str, content_type: str, body: bytes):
+        digest = hashlib.sha256(body).hexdigest()
+        object_path = self._object_path(digest)
+        try:
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            os.makedirs(self.index_dir, exist_ok=True)
+            if not os.path.exists(object_path):
+                write_file_atomically(object_path, body)
+            entry = {"url": url, "sha256": digest, "content_type": content_type}
+            write_file_atomically(self._index_path(url), json.dumps(entry).encode())
+        except OSError as e:
+            bt.logging.warning(f"Error caching asset {url}: {e}")
+        self.memory[url] = (content_type, body)
+
+
+def generate_place_holder_image(width: int = 800, height: int = 600) -> bytes:
+    """
+    Generate the image that is served instead of the place holder image url.
+    """
+    img = Image.new('RGB', (width, height), color = (204, 204, 204))
+    buffered = io.BytesIO()
+    img.save(buffered, format="png")
+    return buffered.getvalue()
+
+
+asset_cache = AssetCache()
+
+place_holder_image = {
+    "body": None,
+}
+
+
+async def handle_asset_route(route):
+    """
+    Playwright route handler which serves the place holder image locally and the allowed
+    CDN assets from the asset cache, fetching and caching them on the first miss.
+    Other requests go to the network as before.
+    """
+    request = route.request
+    url = request.url
+    if request.method != "GET":
+        await route.fallback()
+        return
+
+    if is_place_holder_image_url(url):
+        if place_holder_image["body"] is None:
+            place_holder_image["body"] = generate_place_holder_image()
+        await route.fulfill(status=200, content_type="image/png", body=place_holder_image["body"])
+        return
+
+    if not is_cacheable_url(url):
+        await route.fallback()
+        return
+
+    cached = asset_cache.get(url)
+    if cached is None:
+        try:
+            response = await route.fetch()
+            body = await response.body()
+        except Exception as e:
+            bt.logging.warning(f"Error fetching asset {url}: {e}")
+            await route.abort()
+            return
+        if response.ok:
+            asset_cache.put(url, response.headers.get("content-type", ""), body)
+        await route.fulfill(response=response, body=body)
+        return
+
+    content_type, body = cached
+    await route.fulfill(
+        status=200,
+        content_type=content_type,
+        body=body,
+        headers={"access-control-allow-origin": "*"},
+    )
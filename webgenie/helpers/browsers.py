@@ -0,0 +1,305 @@
+import bittensor as bt
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+
+from webgenie.constants import (
+    BROWSER_POOL_SIZE,
+    BROWSER_POOL_CONTEXTS,
+    BROWSER_CONTEXT_MAX_PAGES,
+    CHROME_HTML_LOAD_TIME,
+    PAGE_READY_TIMEOUT,
+    RENDER_VIEWPORT,
+)
+from webgenie.helpers.assets import INTERCEPTED_URL_PATTERN, handle_asset_route
+
+
+# Resolves to true when the web fonts are loaded and the layout did not change
+# across two animation frames.
+PAGE_STABLE_SCRIPT = """
+async () => {
+    await document.fonts.ready;
+    const layoutSignature = () => {
+        const root = document.documentElement;
+        const body = document.body;
+        return [
+            root.scrollWidth,
+            root.scrollHeight,
+            body ? body.scrollHeight : 0,
+            document.getElementsByTagName('*').length,
+        ].join(',');
+    };
+    const nextFrame = () => new Promise(resolve => requestAnimationFrame(() => resolve()));
+    const signature = layoutSignature();
+    await nextFrame();
+    await nextFrame();
+    return signature === layoutSignature();
+}
+"""
+
+
+class BrowserSlot:
+    """
+    A browser context which serves one leased page at a time.
+    """
+    def __init__(self, browser_index: int):
+        self.browser_index = browser_index
+        self.context = None
+        self.page_count = 0
+
+
+class BrowserPool:
+    """
+    A long-lived pool of chromium browsers, each with a fixed number of contexts.
+    Pages are leased from the pool, browsers are relaunched when they are not connected
+    and contexts are recycled after they served `max_pages_per_context` pages.
+    """
+    def __init__(
+        self,
+        num_browsers: int = BROWSER_POOL_SIZE,
+        contexts_per_browser: int = BROWSER_POOL_CONTEXTS,
+        max_pages_per_context: int = BROWSER_CONTEXT_MAX_PAGES,
+    ):
+        self.num_browsers = max(1, num_browsers)
+        self.contexts_per_browser = max(1, contexts_per_browser)
+        self.max_pages_per_context = max(1, max_pages_per_context)
+
+        self.pid = os.getpid()
+        self.loop = None
+        self.started = False
+        self.web_driver = None
+        self.browsers = [None] * self.num_browsers
+        self.browser_locks = [asyncio.Lock() for _ in range(self.num_browsers)]
+        self.start_lock = asyncio.Lock()
+        self.slots = asyncio.Queue()
+
+    @property
+    def capacity(self) -> int:
+        return self.num_browsers * self.contexts_per_browser
+
+    async def start(self):
+        async with self.start_lock:
+            if self.started:
+                return
+            self.loop = asyncio.get_running_loop()
+            self.web_driver = await async_playwright().start()
+            try:
+                for index in range(self.num_browsers):
+                    self.browsers[index] = await self._launch_browser()
+                    for _ in range(self.contexts_per_browser):
+                        self.slots.put_nowait(BrowserSlot(index))
+            except Exception:
+                # Don't leave the driver and the launched browsers running, the next call starts new ones
+                await self._close_browsers()
+                await self.web_driver.stop()
+                self.web_driver = None
+                self.slots = asyncio.Queue()
+                raise
+            self.started = True
+            bt.logging.debug(
+                f"Started browser pool with {self.num_browsers} browsers "
+                f"and {self.contexts_per_browser} contexts per browser."
+            )
+
+    async def stop(self):
+        async with self.start_lock:
+            if not self.started:
+                return
+            await self._close_browsers()
+            await self.web_driver.stop()
+            self.web_driver = None
+            self.slots = asyncio.Queue()
+            self.started = False
+            bt.logging.debug("Stopped browser pool.")
+
+    async def _close_browsers(self):
+        for index, browser in enumerate(self.browsers):
+            if browser is None:
+                continue
+            try:
+                await browser.close()
+            except Exception as e:
+                bt.logging.warning(f"Error closing browser {index}: {e}")
+            self.browsers[index] = None
+
+    async def _launch_browser(self):
+        return await self.web_driver.chromium.launch(headless=True)
+
+    async def _healthy_browser(self, index: int):
+        async with self.browser_locks[index]:
+            browser = self.browsers[index]
+            if browser is None or not browser.is_connected():
+                bt.logging.warning(f"Browser {index} is not connected, relaunching.")
+                self.browsers[index] = await self._launch_browser()
+            return self.browsers[index]
+
+    async def _close_context(self, slot: BrowserSlot):
+        try:
+            await slot.context.close()
+        except Exception as e:
+            bt.logging.debug(f"Error closing browser context: {e}")
+        slot.context = None
+        slot.page_count = 0
+
+    async def _prepare_slot(self, slot: BrowserSlot):
+        browser = await self._healthy_browser(slot.browser_index)
+        if slot.context is not None and (
+            slot.context.browser is not browser or
+            slot.page_count >= self.max_pages_per_context
+        ):
+            await self._close_context(slot)
+        if slot.context is None:
+            slot.context = await browser.new_context(viewport=RENDER_VIEWPORT)
+            # Serve the allowed CDN assets and the place holder image locally
+            await slot.context.route(INTERCEPTED_URL_PATTERN, handle_asset_route)
+            slot.page_count = 0
+
+    @asynccontextmanager
+    async def lease_page(self):
+        slot = await self.slots.get()
+        page = None
+        try:
+            await self._prepare_slot(slot)
+            page = await slot.context.new_page()
+            slot.page_count += 1
+            yield page
+        finally:
+            if page is not None:
+                try:
+                    await page.close()
+                except Exception as e:
+                    bt.logging.debug(f"Error closing page: {e}")
+            self.slots.put_nowait(slot)
+
+
+async def wait_for_page_ready(page, pending_requests: set, timeout: int = PAGE_READY_TIMEOUT) -> bool:
+    """
+    Wait until the page has no pending network requests, its fonts are loaded
+    and its layout is stable. Gives up after `timeout` milliseconds.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout / 1000
+    while loop.time() < deadline:
+        if pending_requests:
+            await asyncio.sleep(0.01)
+            continue
+        try:
+            is_stable = await asyncio.wait_for(
+                page.evaluate(PAGE_STABLE_SCRIPT),
+                timeout=max(0, deadline - loop.time()),
+            )
+        except asyncio.TimeoutError:
+            break
+        if is_stable and not pending_requests:
+            return True
+    bt.logging.debug(f"Page {page.url} did not become stable in {timeout}ms")
+    return False
+
+
+async def load_page(page, url: str, timeout: int = CHROME_HTML_LOAD_TIME, ready_timeout: int = PAGE_READY_TIMEOUT) -> bool:
+    """
+    Navigate the page to the url and wait until it is ready to be captured.
+    Returns whether the page became stable before `ready_timeout`.
+    """
+    pending_requests = set()
+
+    def on_request(request):
+        if request.url.startswith("http"):
+            pending_requests.add(request)
+
+    def on_request_done(request):
+        pending_requests.discard(request)
+
+    page.on("request", on_request)
+    page.on("requestfinished", on_request_done)
+    page.on("requestfailed", on_request_done)
+    try:
+        await page.goto(url, timeout=timeout, wait_until="load")
+        return await wait_for_page_ready(page, pending_requests, ready_timeout)
+    finally:
+        page.remove_listener("request", on_request)
+        page.remove_listener("requestfinished", on_request_done)
+        page.remove_listener("requestfailed", on_request_done)
+
+
+browser_pool: BrowserPool = None
+
+worker_event_loop = {
+    "pid": None,
+    "loop": None,
+}
+
+
+async def close_stale_browser_pool(pool: BrowserPool):
+    """
+    Stop a browser pool of this process started on another event loop. Its playwright objects
+    only work on their own loop, so the pool is stopped there.
+    """
+    old_loop = pool.loop
+    try:
+        if old_loop.is_closed():
+            bt.logging.warning("The event loop of the previous browser pool is closed, its browsers can't be stopped")
+        elif old_loop.is_running():
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(pool.stop(), old_loop))
+        else:
+            await asyncio.to_thread(old_loop.run_until_complete, pool.stop())
+    except Exception as e:
+        bt.logging.warning(f"Error stopping the previous browser pool: {e}")
+
+
+async def get_browser_pool() -> BrowserPool:
+    """
+    Get the browser pool of the current process and event loop, starting it if needed.
+    The pool of another event loop of this process is stopped, the pool of a parent process
+    belongs to the parent and is left alone.
+    """
+    global browser_pool
+    loop = asyncio.get_running_loop()
+    if (
+        browser_pool is None or
+        browser_pool.pid != os.getpid() or
+        (browser_pool.loop is not None and browser_pool.loop is not loop)
+    ):
+        stale_pool = browser_pool
+        browser_pool = BrowserPool()
+        if stale_pool is not None and stale_pool.pid == os.getpid() and stale_pool.loop is not None:
+            await close_stale_browser_pool(stale_pool)
+    await browser_pool.start()
+    return browser_pool
+
+
+@asynccontextmanager
+async def lease_page():
+    """
+    Lease a fresh page from the browser pool. The page is closed when the context exits.
+    """
+    pool = await get_browser_pool()
+    async with pool.lease_page() as page:
+        yield page
+
+
+async def start_browser():
+    await get_browser_pool()
+
+
+async def stop_browser():
+    global browser_pool
+    if browser_pool is not None and browser_pool.pid == os.getpid():
+        await browser_pool.stop()
+    browser_pool = None
+
+
+def run_in_worker_loop(coro):
+    """
+    Run a coroutine on the long-lived event loop of the current process,
+    so the browser pool stays warm between calls.
+    """
+    if (
+        worker_event_loop["loop"] is None or
+        worker_event_loop["pid"] != os.getpid() or
+        worker_event_loop["loop"].is_closed()
+    ):
+        worker_event_loop["loop"] = asyncio.new_event_loop()
+        worker_event_loop["pid"] = os.getpid()
+    return worker_event_loop["loop"].run_until_complete(coro)
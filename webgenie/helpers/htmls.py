@@ -8,14 +8,15 @@ from bs4 import BeautifulSoup
 from lxml import etree
 from lxml.etree import XMLSyntaxError
 from PIL import Image
-from playwright.async_api import async_playwright
 
 from webgenie.constants import (
     WORK_DIR,
+    ALLOWED_RESOURCE_PATTERNS,
     CHROME_HTML_LOAD_TIME,
-    JAVASCRIPT_RUNNING_TIME,
+    PAGE_READY_TIMEOUT,
     PLACE_HOLDER_IMAGE_URL,
 )
+from webgenie.helpers.browsers import lease_page, load_page
 from webgenie.helpers.images import image_to_base64
     
 
@@ -23,27 +24,17 @@ def is_valid_resources(html_content: str) -> bool:
     """
     Check if the resources in the HTML content are valid.
     """
-    # List of allowed patterns for CSS and JavaScript resources
-    allowed_patterns = [
-        r"https?://cdn.jsdelivr.net/npm/tailwindcss@[^/]+/dist/tailwind.min.css",
-        r"https?://stackpath.bootstrapcdn.com/bootstrap/[^/]+/css/bootstrap.min.css",
-        r"https?://code.jquery.com/jquery-[^/]+.min.js",
-        r"https?://stackpath.bootstrapcdn.com/bootstrap/[^/]+/js/bootstrap.bundle.min.js",
-        r"https?://cdnjs.cloudflare.com/ajax/libs/font-awesome/[^/]+/css/font-awesome.min.css",
-        r"https?://fonts.googleapis.com/css2?family=Roboto:wght@300;400;500;700&display=swap",
-    ]
-    
     soup = BeautifulSoup(html_content, 'html.parser')
     resources = soup.find_all(['link', 'script'])
     
     for resource in resources:
         if resource.name == 'link' and resource.get('rel') == ['stylesheet']:
             href = resource.get('href')
-            if href and not any(re.match(pattern, href) for pattern in allowed_patterns):
+            if href and not any(re.match(pattern, href) for pattern in ALLOWED_RESOURCE_PATTERNS):
                 return True
         elif resource.name == 'script':
             src = resource.get('src')
-            if src and not any(re.match(pattern, src) for pattern in allowed_patterns):
+            if src and not any(re.match(pattern, src) for pattern in ALLOWED_RESOURCE_PATTERNS):
                 return True
 
     return True
@@ -84,7 +75,7 @@ def seperate_html_css(html_content: str) -> tuple[str, str]:
     return cleaned_html, css
 
 
-async def html_to_screenshot(html_content: str, page_load_time: int = 1000) -> str:
+async def html_to_screenshot(html_content: str, page_load_time: int = PAGE_READY_TIMEOUT) -> str:
     """
     Take a screenshot of the HTML content.
     """
@@ -95,16 +86,9 @@ async def html_to_screenshot(html_content: str, page_load_time: int = 1000) -> s
     url = f"file://{os.path.abspath(html_path)}"
     
     try:
-        async with async_playwright() as p:
-            # Choose a browser, e.g., Chromium, Firefox, or WebKit
-            browser = await p.chromium.launch()
-            page = await browser.new_page()
-
-            # Navigate to the URL
-            await page.goto(url, timeout=CHROME_HTML_LOAD_TIME)
-
-            await page.wait_for_load_state('networkidle')
-            await page.wait_for_timeout(JAVASCRIPT_RUNNING_TIME)
+        async with lease_page() as page:
+            # Navigate to the URL and wait until the page is stable
+            await load_page(page, url, ready_timeout=page_load_time)
             
             # Take the screenshot
             await page.screenshot(
@@ -113,8 +97,6 @@ async def html_to_screenshot(html_content: str, page_load_time: int = 1000) -> s
                 animations="disabled", 
                 timeout=CHROME_HTML_LOAD_TIME,
             )
-            await page.close()
-            await browser.close()
     except Exception as e: 
         bt.logging.error(f"Failed to take screenshot due to: {e}. Generating a blank image.")
         # Generate a blank image 
@@ -0,0 +1,187 @@
+import bittensor as bt
+import asyncio
+import itertools
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.util import Finalize
+
+from webgenie.constants import NUMBER_OF_CONCURRENT_WORKERS, SOLUTION_SCORING_TIMEOUT
+
+
+scoring_pool = {
+    "pid": None,
+    "executor": None,
+    # Queue the workers put the (job id, start time) of their jobs into
+    "started_jobs": None,
+}
+
+# Start times of the running jobs of map_in_scoring_pool, by job id
+job_start_times = {}
+
+job_ids = itertools.count()
+
+# Started jobs queue of the current worker process
+worker_state = {
+    "started_jobs": None,
+}
+
+
+def stop_worker():
+    from webgenie.rewards.visual_reward.common.browser import run_in_worker_loop, stop_browser
+
+    try:
+        run_in_worker_loop(stop_browser())
+    except Exception as e:
+        bt.logging.warning(f"Error stopping the browsers of scoring worker {os.getpid()}: {e}")
+
+
+def warm_up_worker(started_jobs=None):
+    """
+    Initializer of the scoring workers. Starts the browsers and loads the CLIP model once,
+    so every job of the worker finds them warm.
+    """
+    worker_state["started_jobs"] = started_jobs
+    from webgenie.rewards.visual_reward.common.browser import run_in_worker_loop, start_browser
+    from webgenie.rewards.visual_reward.high_level_matching_score.clip_model import get_clip_model
+
+    # Worker processes skip atexit, finalizers with an exit priority still run
+    Finalize(None, stop_worker, exitpriority=10)
+    try:
+        run_in_worker_loop(start_browser())
+        get_clip_model()
+    except Exception as e:
+        bt.logging.warning(f"Error warming up scoring worker {os.getpid()}: {e}")
+
+
+def worker_ready() -> int:
+    return os.getpid()
+
+
+def run_started_job(job_id: int, func, *args):
+    """
+    Run a job of map_in_scoring_pool in a worker, telling the pool when it really starts.
+    """
+    started_jobs = worker_state["started_jobs"]
+    if started_jobs is not None:
+        started_jobs.put((job_id, time.time()))
+    return func(*args)
+
+
+def collect_started_jobs():
+    started_jobs = scoring_pool["started_jobs"]
+    while started_jobs is not None:
+        try:
+            job_id, started_at = started_jobs.get_nowait()
+        except (queue.Empty, OSError, ValueError):
+            break
+        job_start_times[job_id] = started_at
+
+
+def start_scoring_pool(num_workers: int = NUMBER_OF_CONCURRENT_WORKERS) -> ProcessPoolExecutor:
+    """
+    Start the scoring workers of the current process, if they are not running yet.
+    """
+    if scoring_pool["executor"] is None or scoring_pool["pid"] != os.getpid():
+        bt.logging.info(f"Starting scoring pool with {num_workers} workers")
+        started_jobs = multiprocessing.Queue()
+        executor = ProcessPoolExecutor(max_workers=num_workers, initializer=warm_up_worker, initargs=(started_jobs,))
+        # Workers are started on the first job, start them right away
+        executor.submit(worker_ready)
+        scoring_pool["executor"] = executor
+        scoring_pool["started_jobs"] = started_jobs
+        scoring_pool["pid"] = os.getpid()
+    return scoring_pool["executor"]
+
+
+def close_started_jobs():
+    started_jobs = scoring_pool["started_jobs"]
+    scoring_pool["started_jobs"] = None
+    if started_jobs is not None:
+        started_jobs.close()
+
+
+def restart_scoring_pool(executor: ProcessPoolExecutor):
+    if scoring_pool["executor"] is executor:
+        scoring_pool["executor"] = None
+        executor.shutdown(wait=False, cancel_futures=True)
+        close_started_jobs()
+
+
+def stop_scoring_pool():
+    executor = scoring_pool["executor"]
+    if executor is not None and scoring_pool["pid"] == os.getpid():
+        bt.logging.info("Stopping scoring pool")
+        executor.shutdown(wait=True, cancel_futures=True)
+        close_started_jobs()
+    scoring_pool["executor"] = None
+    scoring_pool["started_jobs"] = None
+    scoring_pool["pid"] = None
+
+
+async def run_in_scoring_pool(func, *args):
+    """
+    Run `func(*args)` in a scoring worker. `func` must be a module level function and
+    its arguments should be small, they are pickled to the worker for every job.
+    The pool is restarted if a worker died.
+    """
+    executor = start_scoring_pool()
+    try:
+        return await asyncio.wrap_future(executor.submit(func, *args))
+    except BrokenProcessPool:
+        bt.logging.error("A scoring worker died, restarting the scoring pool")
+        restart_scoring_pool(executor)
+        raise
+
+
+async def map_in_scoring_pool(func, jobs: list, timeout: float = SOLUTION_SCORING_TIMEOUT, default=0) -> list:
+    """
+    Run `func(*args)` for the args of every job in the scoring workers and collect the results
+    in the order of the jobs. Jobs wait in the queue of the pool and each free worker takes the
+    next one, so a slow job only holds up its own worker.
+    A job still running `timeout` seconds after a worker started it, or failing, gets `default`.
+    The clock starts in the worker, so jobs waiting behind slow ones don't time out before they run.
+    Jobs should stop by themselves around their timeout, as a running job can't be interrupted.
+    """
+    ids = [next(job_ids) for _ in jobs]
+    executor = start_scoring_pool()
+    try:
+        futures = [executor.submit(run_started_job, job_id, func, *args) for job_id, args in zip(ids, jobs)]
+    except BrokenProcessPool:
+        restart_scoring_pool(executor)
+        executor = start_scoring_pool()
+        futures = [executor.submit(run_started_job, job_id, func, *args) for job_id, args in zip(ids, jobs)]
+    results = [default] * len(jobs)
+    waiters = {asyncio.wrap_future(future): index for index, future in enumerate(futures)}
+    pool_broken = False
+
+    while waiters:
+        done, _ = await asyncio.wait(waiters.keys(), timeout=1, return_when=asyncio.FIRST_COMPLETED)
+        for waiter in done:
+            index = waiters.pop(waiter)
+            try:
+                results[index] = waiter.result()
+            except BrokenProcessPool:
+                pool_broken = True
+            except Exception as e:
+                bt.logging.error(f"Error in scoring job {index} of {func.__name__}: {e}")
+
+        collect_started_jobs()
+        now = time.time()
+        for waiter, index in list(waiters.items()):
+            started_at = job_start_times.get(ids[index])
+            if started_at is not None and now - started_at > timeout:
+                bt.logging.warning(f"Scoring job {index} of {func.__name__} timed out after {timeout}s")
+                waiters.pop(waiter)
+                waiter.cancel()
+
+    collect_started_jobs()
+    for job_id in ids:
+        job_start_times.pop(job_id, None)
+    if pool_broken:
+        bt.logging.error("A scoring worker died, restarting the scoring pool")
+        restart_scoring_pool(executor)
+    return results
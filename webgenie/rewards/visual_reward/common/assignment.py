@@ -0,0 +1,170 @@
+import bittensor as bt
+import numpy as np
+from math import floor
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+
+from webgenie.constants import (
+    ASSIGNMENT_CANDIDATE_RADIUS,
+    ASSIGNMENT_DENSE_LIMIT,
+    ASSIGNMENT_MAX_CANDIDATES,
+)
+from webgenie.rewards.visual_reward.common.similarity import bounding_box_array
+
+
+# Smallest cell of the grid index, in scaled coordinates
+MIN_GRID_CELL_SIZE = 0.02
+
+
+class GridIndex:
+    """
+    Buckets (x, y, width, height) boxes in scaled coordinates into the cells of a uniform grid.
+    Coordinates outside of [0, 1] fall into the border cells, so a box never spans more than
+    (1 / cell_size + 2) ** 2 cells.
+    """
+    def __init__(self, boxes: np.ndarray, cell_size: float):
+        self.cell_size = max(cell_size, MIN_GRID_CELL_SIZE)
+        self.max_cell = int(np.ceil(1 / self.cell_size))
+        self.cells = {}
+        for index, box in enumerate(boxes):
+            for cell in self._cells(box):
+                self.cells.setdefault(cell, []).append(index)
+
+    def _cell(self, value: float) -> int:
+        return min(max(floor(value / self.cell_size), -1), self.max_cell)
+
+    def _cells(self, box):
+        x, y, width, height = box
+        for cell_x in range(self._cell(x), self._cell(x + width) + 1):
+            for cell_y in range(self._cell(y), self._cell(y + height) + 1):
+                yield cell_x, cell_y
+
+    def query(self, box) -> np.ndarray:
+        """
+        The sorted indices of the boxes sharing a cell with the box.
+        """
+        indices = set()
+        for cell in self._cells(box):
+            indices.update(self.cells.get(cell, []))
+        return np.array(sorted(indices), dtype=int)
+
+
+def closest_boxes(box, boxes: np.ndarray, candidates: np.ndarray, count: int) -> np.ndarray:
+    """
+    The `count` candidates whose boxes are the least shifted from the box, as in the block similarity.
+    """
+    if len(candidates) <= count:
+        return candidates
+    x, y, width, height = box
+    ox, oy, ow, oh = boxes[candidates].T
+    shift = np.abs(ox - x) + np.abs(oy - y) + np.abs(ox + ow - x - width) + np.abs(oy + oh - y - height)
+    return np.sort(candidates[np.argpartition(shift, count - 1)[:count]])
+
+
+def candidate_pairs(
+    predicted_boxes: np.ndarray,
+    original_boxes: np.ndarray,
+    predicted_keys=None,
+    original_keys=None,
+    radius: float = ASSIGNMENT_CANDIDATE_RADIUS,
+    max_candidates: int = ASSIGNMENT_MAX_CANDIDATES,
+):
+    """
+    The (rows, cols) of the pairs of predicted and original boxes at most `radius` apart.
+    Each predicted box keeps the `max_candidates` nearby original boxes with the closest edges.
+    When keys are given, boxes with the same non empty key are also candidates wherever they are,
+    so moved elements with the same text can still match, up to `max_candidates` more per box.
+    """
+    index = GridIndex(original_boxes, radius)
+    key_index = {}
+    for j, key in enumerate(original_keys or []):
+        if key:
+            key_index.setdefault(key, []).append(j)
+
+    rows, cols = [], []
+    for i, box in enumerate(predicted_boxes):
+        x, y, width, height = box
+        candidates = index.query((x - radius, y - radius, width + 2 * radius, height + 2 * radius))
+        if len(candidates) > 0:
+            ox, oy, ow, oh = original_boxes[candidates].T
+            # Gap between the boxes along each axis, 0 if they overlap
+            gap_x = np.maximum(np.maximum(ox, x) - np.minimum(ox + ow, x + width), 0)
+            gap_y = np.maximum(np.maximum(oy, y) - np.minimum(oy + oh, y + height), 0)
+            candidates = closest_boxes(box, original_boxes, candidates[np.maximum(gap_x, gap_y) <= radius], max_candidates)
+
+        if predicted_keys and predicted_keys[i] in key_index:
+            same_key = np.array(key_index[predicted_keys[i]], dtype=int)
+            same_key = closest_boxes(box, original_boxes, same_key, max_candidates)
+            candidates = np.union1d(candidates, same_key)
+
+        rows.extend([i] * len(candidates))
+        cols.extend(candidates)
+    return np.array(rows, dtype=int), np.array(cols, dtype=int)
+
+
+def sparse_linear_sum_assignment(rows: np.ndarray, cols: np.ndarray, similarities: np.ndarray, shape):
+    """
+    The assignment maximizing the sum of similarities when only the (rows, cols) pairs can match.
+    Returns the row and column indices of the matched pairs and the positions of the pairs in `rows`.
+    """
+    n, m = shape
+    # Every row also gets its own dummy column, which stands for being left unmatched with a similarity
+    # of 0, so a full matching always exists. The costs are shifted to be positive, sparse graphs
+    # have no explicit zero weights.
+    offset = max(similarities.max(initial=0), 0) + 1
+    graph = csr_matrix(
+        (
+            np.concatenate([offset - similarities, np.full(n, offset)]),
+            (np.concatenate([rows, np.arange(n)]), np.concatenate([cols, m + np.arange(n)])),
+        ),
+        shape=(n, m + n),
+    )
+    row_ind, col_ind = min_weight_full_bipartite_matching(graph)
+    matched = col_ind < m
+    row_ind, col_ind = row_ind[matched], col_ind[matched]
+
+    keys = rows * m + cols
+    order = np.argsort(keys)
+    positions = order[np.searchsorted(keys, row_ind * m + col_ind, sorter=order)]
+    return row_ind, col_ind, positions
+
+
+def assign_elements(
+    predicted_elements,
+    original_elements,
+    similarity_matrix,
+    similarity_pairs,
+    candidate_key=None,
+    dense_limit: int = ASSIGNMENT_DENSE_LIMIT,
+):
+    """
+    Match the predicted and original elements maximizing the sum of their similarities.
+    `similarity_matrix(predicted_elements, original_elements)` gives the N x M similarities and
+    `similarity_pairs(predicted_elements, original_elements)` those of the i-th elements of both lists.
+    `candidate_key(element)`, if given, makes the elements with the same key candidates of each other.
+
+    Small pages are matched exactly on the dense matrix. Larger ones only compare the elements near
+    each other and solve a sparse assignment, so their cost grows with N * ASSIGNMENT_MAX_CANDIDATES
+    instead of N * M.
+    Returns the row and column indices of the matched pairs and their similarities.
+    """
+    n, m = len(predicted_elements), len(original_elements)
+    if n * m <= dense_limit:
+        matrix = similarity_matrix(predicted_elements, original_elements)
+        row_ind, col_ind = linear_sum_assignment(-matrix)
+        return row_ind, col_ind, matrix[row_ind, col_ind]
+
+    rows, cols = candidate_pairs(
+        bounding_box_array(predicted_elements),
+        bounding_box_array(original_elements),
+        [candidate_key(element) for element in predicted_elements] if candidate_key else None,
+        [candidate_key(element) for element in original_elements] if candidate_key else None,
+    )
+    bt.logging.debug(f"Matching {n} x {m} elements on {len(rows)} candidate pairs")
+    similarities = np.asarray(similarity_pairs(
+        [predicted_elements[i] for i in rows],
+        [original_elements[j] for j in cols],
+    ), dtype=np.float64).reshape(-1)
+    row_ind, col_ind, positions = sparse_linear_sum_assignment(rows, cols, similarities, (n, m))
+    return row_ind, col_ind, similarities[positions]
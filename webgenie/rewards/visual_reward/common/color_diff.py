@@ -77,4 +77,97 @@ def color_similarity_ciede2000(rgb1, rgb2):
     
     # Normalize the Delta E value to get a similarity score
     similarity = max(0, 1 - (delta_e / 100))
-    return similarity
\ No newline at end of file
+    return similarity
+
+
+# sRGB to XYZ matrix and the D65 white point (2 degree observer), as used by colormath
+SRGB_TO_XYZ = np.array([
+    [0.412424, 0.357579, 0.180464],
+    [0.212656, 0.715158, 0.0721856],
+    [0.0193324, 0.119193, 0.950444],
+])
+
+D65_WHITE_POINT = np.array([0.95047, 1.00000, 1.08883])
+
+CIE_E = 216.0 / 24389.0
+
+
+def rgb_to_lab_array(rgb):
+    """
+    Convert an (N, 3) array of RGB colors in the range [0, 255] to an (N, 3) array of
+    Lab colors, with the same formulas as `rgb_to_lab`.
+    """
+    rgb = np.asarray(rgb, dtype=np.float64).reshape(-1, 3) / 255
+    linear = np.where(rgb <= 0.04045, rgb / 12.92, np.power((rgb + 0.055) / 1.055, 2.4))
+    xyz = np.maximum(linear @ SRGB_TO_XYZ.T, 0.0)
+
+    t = xyz / D65_WHITE_POINT
+    t = np.where(t > CIE_E, np.power(t, 1.0 / 3.0), 7.787 * t + 16.0 / 116.0)
+    lab_l = 116.0 * t[:, 1] - 16.0
+    lab_a = 500.0 * (t[:, 0] - t[:, 1])
+    lab_b = 200.0 * (t[:, 1] - t[:, 2])
+    return np.stack([lab_l, lab_a, lab_b], axis=-1)
+
+
+def delta_e_cie2000_broadcast(lab1, lab2):
+    """
+    `delta_e_cie2000` of Lab color arrays whose last axis is (L, a, b), with numpy broadcasting.
+    """
+    L1, a1, b1 = lab1[..., 0], lab1[..., 1], lab1[..., 2]
+    L2, a2, b2 = lab2[..., 0], lab2[..., 1], lab2[..., 2]
+
+    delta_L = L1 - L2
+
+    C1 = np.sqrt(a1**2 + b1**2)
+    C2 = np.sqrt(a2**2 + b2**2)
+    delta_C = C1 - C2
+
+    h1 = np.arctan2(b1, a1)
+    h2 = np.arctan2(b2, a2)
+
+    delta_H = h1 - h2
+    delta_H = np.where(delta_H < 0, delta_H + 2 * np.pi, delta_H)
+    delta_H = np.where(delta_H > np.pi, delta_H - 2 * np.pi, delta_H)
+
+    delta_H_star = 2 * np.sqrt(C1 * C2) * np.sin(delta_H / 2)
+
+    delta_theta = h1 - h2 + np.radians(30)
+    R_T = -0.17 * np.cos(delta_theta) + 0.24 * np.cos(2 * h1 + np.radians(60)) \
+          - 0.32 * np.cos(3 * h1 + np.radians(120)) + 0.2 * np.cos(4 * h1 - np.radians(63))
+
+    term1 = delta_L**2
+    term2 = delta_C**2
+    term3 = delta_H_star**2
+    term4 = R_T * delta_C * delta_H_star
+
+    return np.sqrt(term1 + term2 + term3 + term4)
+
+
+def delta_e_cie2000_matrix(lab1, lab2):
+    """
+    The `delta_e_cie2000` of every pair of an (N, 3) and an (M, 3) array of Lab colors, as an N x M matrix.
+    """
+    lab1 = np.asarray(lab1, dtype=np.float64).reshape(-1, 3)
+    lab2 = np.asarray(lab2, dtype=np.float64).reshape(-1, 3)
+    return delta_e_cie2000_broadcast(lab1[:, None, :], lab2[None, :, :])
+
+
+def delta_e_to_similarity(delta_e):
+    similarity = 1 - (delta_e / 100)
+    # Same as max(0, similarity), which also maps nan to 0
+    return np.where(similarity > 0, similarity, 0.0)
+
+
+def color_similarity_ciede2000_matrix(rgb1, rgb2):
+    """
+    The `color_similarity_ciede2000` of every pair of an (N, 3) and an (M, 3) array of RGB colors,
+    as an N x M matrix of scores between 0 and 1.
+    """
+    return delta_e_to_similarity(delta_e_cie2000_matrix(rgb_to_lab_array(rgb1), rgb_to_lab_array(rgb2)))
+
+
+def color_similarity_ciede2000_pairs(rgb1, rgb2):
+    """
+    The `color_similarity_ciede2000` of the i-th colors of two (N, 3) arrays of RGB colors, as an array of N scores.
+    """
+    return delta_e_to_similarity(delta_e_cie2000_broadcast(rgb_to_lab_array(rgb1), rgb_to_lab_array(rgb2)))
@@ -1,19 +1,10 @@
 import bittensor as bt
-import os
-import asyncio
 import numpy as np
-from PIL import Image
 from pydantic import BaseModel, Field
 from typing import Any
-from skimage import io, color
 
-from webgenie.constants import (
-    DEFAULT_LOAD_TIME, 
-    CHROME_HTML_LOAD_TIME,
-    JAVASCRIPT_RUNNING_TIME,
-)
-from webgenie.rewards.visual_reward.common.browser import web_player
-from webgenie.rewards.visual_reward.common.sift import extract_sift_from_roi
+from webgenie.rewards.visual_reward.common.integral_image import IntegralImage
+from webgenie.rewards.visual_reward.common.sift import ScreenshotSiftExtractor
 
 
 class HTMLElement(BaseModel):
@@ -48,140 +39,136 @@ def parse_rgb_string(rgb_str: str) -> tuple[int, int, int]:
         return (0, 0, 0)
 
 
-async def extract_html_elements(file_path, load_time = DEFAULT_LOAD_TIME):
-    if os.path.exists(file_path):
-        url = f"file:///{os.path.abspath(file_path)}"
-
-    screenshot_path = file_path.replace(".html", ".png")
-
+# Walks the whole DOM in the page in the same order as a stack based traversal from the body
+# and returns a columnar payload, so the extraction costs a single round trip to the browser.
+# Texts are only collected where they are used: leaf elements, buttons, inputs and anchors.
+EXTRACT_ELEMENTS_SCRIPT = """
+() => {
+    const payload = {
+        tags: [],
+        texts: [],
+        rects: [],
+        colors: [],
+        input_types: [],
+        placeholders: [],
+        has_children: [],
+    };
+    const scrollX = window.scrollX;
+    const scrollY = window.scrollY;
+    const stack = document.body ? [document.body] : [];
+    while (stack.length > 0) {
+        const el = stack.pop();
+        for (const child of el.children) {
+            stack.push(child);
+        }
+        if (!(el instanceof HTMLElement)) {
+            continue;
+        }
+        const rect = el.getBoundingClientRect();
+        if (rect.width <= 0 || rect.height <= 0) {
+            continue;
+        }
+        const tag = el.tagName.toLowerCase();
+        const hasChildren = el.children.length > 0;
+        const needsText = !hasChildren || tag === 'button' || tag === 'input' || tag === 'a';
+        payload.tags.push(tag);
+        payload.texts.push(needsText ? el.innerText : '');
+        payload.rects.push([rect.x + scrollX, rect.y + scrollY, rect.width, rect.height]);
+        payload.colors.push(window.getComputedStyle(el).color || 'rgb(0, 0, 0)');
+        payload.input_types.push(el.getAttribute('type') || 'text');
+        payload.placeholders.push(el.getAttribute('placeholder') || '');
+        payload.has_children.push(hasChildren);
+    }
+    return payload;
+}
+"""
+
+
+async def extract_html_elements(page, W, H):
+    """
+    Extract the text, button, input and anchor elements of an already loaded page.
+    W and H are the size of the full page screenshot, used to scale the bounding boxes.
+    """
     text_elements = []
     button_elements = []
     input_elements = []
-    anchor_elements = []        
-    try:
-        page = await web_player["browser"].new_page()
-
-        await page.goto(url, timeout=CHROME_HTML_LOAD_TIME)
-
-        await page.wait_for_load_state("networkidle")
-        await page.wait_for_timeout(JAVASCRIPT_RUNNING_TIME)
-        
-        if not os.path.exists(screenshot_path):
-            await page.screenshot(
-                path=screenshot_path, 
-                full_page=True, 
-                animations="disabled", 
-                timeout=CHROME_HTML_LOAD_TIME,
-            )
-            
-        with open(screenshot_path, "rb") as f:
-            screenshot = Image.open(f)
-            W, H = screenshot.size
-
-        async def add_element(node, has_children):
-            # Combine all necessary evaluations into one to reduce overhead
-            rendered_data = await node.evaluate("""
-                (el) => {
-                    const styles = window.getComputedStyle(el);
-                    const type = el.getAttribute('type') || 'text';
-                    const placeholder = el.getAttribute('placeholder') || '';
-                    return {
-                        tagName: el.tagName.toLowerCase(),
-                        color: styles.color || 'rgb(0, 0, 0)',
-                        type: type,
-                        placeholder: placeholder
-                    };
-                }
-            """)
-            
-            # Extract all relevant data from the evaluated result
-            text = await node.inner_text()
-            bounding_box = await node.bounding_box()
-            
-            # Early return if no bounding box or invalid dimensions
-            if bounding_box is None or bounding_box["width"] <= 0 or bounding_box["height"] <= 0:
-                return
-
-            scaled_bounding_box = {
-                "x": bounding_box["x"] / W,
-                "y": bounding_box["y"] / H,
-                "width": bounding_box["width"] / W,
-                "height": bounding_box["height"] / H
-            }
-
-            # Create the HTMLElement object with the extracted data
-            element_data = HTMLElement(
-                text=text, 
-                bounding_box=bounding_box, 
-                scaled_bounding_box=scaled_bounding_box,
+    anchor_elements = []
+
+    payload = await page.evaluate(EXTRACT_ELEMENTS_SCRIPT)
+    for i, tag_name in enumerate(payload["tags"]):
+        x, y, width, height = payload["rects"][i]
+        text = payload["texts"][i]
+        bounding_box = {
+            "x": x,
+            "y": y,
+            "width": width,
+            "height": height,
+        }
+        scaled_bounding_box = {
+            "x": bounding_box["x"] / W,
+            "y": bounding_box["y"] / H,
+            "width": bounding_box["width"] / W,
+            "height": bounding_box["height"] / H
+        }
+
+        # Create the HTMLElement object with the extracted data
+        element_data = HTMLElement(
+            text=text, 
+            bounding_box=bounding_box, 
+            scaled_bounding_box=scaled_bounding_box,
+        )
+
+        # Add the element based on its tag name
+        if tag_name == "button":
+            button_elements.append(element_data)
+        elif tag_name == "input":
+            # Additional input-specific properties
+            element_data.input_type = payload["input_types"][i]
+            element_data.input_placeholder = payload["placeholders"][i]
+            input_elements.append(element_data)
+        elif tag_name == "a":
+            anchor_elements.append(element_data)
+
+        # Add to text elements only if no children
+        if not payload["has_children"][i]:
+            text_elements.append(
+                HTMLElement(
+                    text=text, 
+                    bounding_box=bounding_box, 
+                    scaled_bounding_box=scaled_bounding_box,
+                    color=parse_rgb_string(payload["colors"][i]),
+                )
             )
 
-            # Add the element based on its tag name
-            if rendered_data['tagName'] == "button":
-                button_elements.append(element_data)
-            elif rendered_data['tagName'] == "input":
-                # Additional input-specific properties
-                element_data.input_type = rendered_data['type']
-                element_data.input_placeholder = rendered_data['placeholder']
-                input_elements.append(element_data)
-            elif rendered_data['tagName'] == "a":
-                anchor_elements.append(element_data)
-
-            # Add to text elements only if no children
-            if not has_children:
-                text_elements.append(
-                    HTMLElement(
-                        text=text, 
-                        bounding_box=bounding_box, 
-                        scaled_bounding_box=scaled_bounding_box,
-                        color=parse_rgb_string(rendered_data['color']),
-                    )
-                )
-                    
-        async def traverse(node):
-            stack = [node]
-            while stack:
-                current_node = stack.pop()
-                children = await current_node.query_selector_all(':scope > *')
-                for child in children:
-                    stack.append(child)
-                try:
-                    await add_element(current_node, bool(children))
-                except Exception as e:
-                    #bt.logging.warning(f"Error adding element: {e}")
-                    pass
-                # Dispose the node when done
-                await current_node.dispose()
-            
-        await traverse(await page.query_selector('body'))
-        await page.close()
-        preprocess_html_elements(file_path, button_elements)
-        preprocess_html_elements(file_path, input_elements)
-        preprocess_html_elements(file_path, anchor_elements)    
-    except Exception as e:
-        bt.logging.error(f"Error extracting html elements from {file_path}: {e}")
     return text_elements, button_elements, input_elements, anchor_elements
 
 
-def preprocess_html_elements(html_path, html_elements):
-    image_path = html_path.replace(".html", ".png")
-    color_image = io.imread(image_path)
+def preprocess_html_elements(
+    color_image,
+    html_elements,
+    sift_extractor: ScreenshotSiftExtractor = None,
+    integral_image: IntegralImage = None,
+):
+    """
+    Compute the average color and the sift features of the html elements
+    from the RGB screenshot array of the page.
+    Pass the same `sift_extractor` for all the element lists of a screenshot to share its features,
+    and its `integral_image` to average the colors of large elements in constant time.
+    """
     for element in html_elements:
         bbox = element.bounding_box
         x, y, w, h = int(bbox["x"]), int(bbox["y"]), int(bbox["width"]), int(bbox["height"]) 
         try:
-            element.avg_color = np.mean(color_image[y:y+h, x:x+w], axis=(0, 1))
+            if integral_image is not None:
+                element.avg_color = integral_image.mean(x, y, w, h)
+            else:
+                element.avg_color = np.mean(color_image[y:y+h, x:x+w], axis=(0, 1))
         except Exception as e:
-            #bt.logging.warning(f"Error calculating avg color of html elements from {html_path}: {e}")
+            #bt.logging.warning(f"Error calculating avg color of html elements: {e}")
             element.avg_color = (0, 0, 0)
 
-    gray_image = color.rgb2gray(color_image)
+    sift_extractor = sift_extractor or ScreenshotSiftExtractor(color_image)
     for element in html_elements:
         bbox = element.bounding_box
         x, y, w, h = int(bbox["x"]), int(bbox["y"]), int(bbox["width"]), int(bbox["height"])
-        try:
-            element.keypoints, element.descriptors = extract_sift_from_roi(gray_image, (x, y, w, h))   
-        except Exception as e:
-            #bt.logging.warning(f"Error extracting sift from html elements from {html_path}: {e}")
-            element.keypoints = None
-            element.descriptors = None
+        element.keypoints, element.descriptors = sift_extractor.extract((x, y, w, h))
@@ -0,0 +1,54 @@
+import numpy as np
+
+
+class IntegralImage:
+    """
+    The summed-area table of an image, giving the sum and the mean of any region in O(1).
+    Regions follow the numpy slicing of `image[y:y+h, x:x+w]`, so the results are the same as
+    summing or averaging that slice.
+    uint8 images are summed in uint32, which wraps around but stays exact for regions of
+    fewer than 2 ** 32 / 255 pixels, more than any screenshot.
+    """
+    def __init__(self, image: np.ndarray):
+        image = np.asarray(image)
+        self.height, self.width = image.shape[:2]
+        self.channels = image.shape[2:]
+        dtype = np.uint32 if image.dtype == np.uint8 else np.float64
+
+        # Converting first and accumulating in place is much faster than casting in cumsum
+        self.table = np.zeros((self.height + 1, self.width + 1) + self.channels, dtype=dtype)
+        cumulative = self.table[1:, 1:]
+        cumulative[...] = image
+        np.cumsum(cumulative, axis=0, out=cumulative)
+        np.cumsum(cumulative, axis=1, out=cumulative)
+
+    def _bounds(self, x: int, y: int, w: int, h: int):
+        y0, y1, _ = slice(y, y + h).indices(self.height)
+        x0, x1, _ = slice(x, x + w).indices(self.width)
+        return x0, y0, max(x1, x0), max(y1, y0)
+
+    def sum(self, x: int, y: int, w: int, h: int) -> np.ndarray:
+        """
+        The sum of `image[y:y+h, x:x+w]` over its rows and columns, as float64.
+        """
+        x0, y0, x1, y1 = self._bounds(x, y, w, h)
+        table = self.table
+        total = table[y1, x1] - table[y0, x1] - table[y1, x0] + table[y0, x0]
+        return np.asarray(total, dtype=np.float64)
+
+    def mean(self, x: int, y: int, w: int, h: int) -> np.ndarray:
+        """
+        The same as `np.mean(image[y:y+h, x:x+w], axis=(0, 1))`, nan for empty regions.
+        """
+        x0, y0, x1, y1 = self._bounds(x, y, w, h)
+        count = (x1 - x0) * (y1 - y0)
+        if count == 0:
+            return np.full(self.channels, np.nan)
+        return self.sum(x, y, w, h) / count
+
+
+def covered_area(html_elements) -> float:
+    """
+    The sum of the bounding box areas of the html elements, overlapping areas are counted for each element.
+    """
+    return sum(element.bounding_box["width"] * element.bounding_box["height"] for element in html_elements)
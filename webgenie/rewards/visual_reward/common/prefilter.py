@@ -0,0 +1,92 @@
+import bittensor as bt
+import numpy as np
+from PIL import Image
+
+from webgenie.constants import (
+    VISUAL_PREFILTER_MIN_CONTENT,
+    VISUAL_PREFILTER_MIN_HASH_SIMILARITY,
+    VISUAL_PREFILTER_MIN_HISTOGRAM_SIMILARITY,
+)
+from webgenie.rewards.visual_reward.high_level_matching_score.histogram import (
+    compare_histograms,
+    compute_grayscale_histogram,
+)
+
+
+# Width of the thumbnail the content of a screenshot is measured on
+THUMBNAIL_WIDTH = 160
+# Gray level difference from the background for a thumbnail pixel to be content
+CONTENT_THRESHOLD = 16
+
+
+def perceptual_hash(image: np.ndarray, hash_size: int = 16) -> np.ndarray:
+    """
+    The difference hash of an RGB image: the screenshot is shrunk to hash_size x hash_size
+    grayscale cells and each bit tells whether a cell is brighter than its right neighbour.
+    """
+    img = Image.fromarray(image).convert("L").resize((hash_size + 1, hash_size), Image.BOX)
+    cells = np.asarray(img, dtype=np.int16)
+    return (cells[:, :-1] > cells[:, 1:]).ravel()
+
+
+def hash_similarity(hash1: np.ndarray, hash2: np.ndarray) -> float:
+    """
+    The fraction of equal bits of two perceptual hashes, 1 for the same layout and around 0.5 for unrelated ones.
+    """
+    return float(np.mean(hash1 == hash2))
+
+
+def content_fraction(image: np.ndarray) -> float:
+    """
+    The fraction of a thumbnail of the RGB image differing from its most common gray level,
+    close to 0 for blank pages and pages with a single line of text.
+    """
+    img = Image.fromarray(image).convert("L")
+    height = max(1, img.height * THUMBNAIL_WIDTH // max(img.width, 1))
+    thumbnail = np.asarray(img.resize((THUMBNAIL_WIDTH, height), Image.BOX), dtype=np.int16)
+    background = np.bincount(thumbnail.ravel(), minlength=256).argmax()
+    return float(np.mean(np.abs(thumbnail - background) > CONTENT_THRESHOLD))
+
+
+class ScreenshotSummary:
+    """
+    The cheap features of a screenshot the prefilter compares.
+    """
+    def __init__(self, image: np.ndarray):
+        self.hash = perceptual_hash(image)
+        self.histogram = compute_grayscale_histogram(image)
+        self.content = content_fraction(image)
+
+
+def prefilter_renders(predict_renders, original_render) -> np.ndarray:
+    """
+    Whether each predicted render is plausible enough to go through the full visual metrics.
+    Blank pages, pages with barely any content like a lone error message, and pages whose layout
+    and colors are both far from the original are rejected. The original page decides what is
+    rejected, a blank original rejects nothing for being blank.
+    """
+    original = ScreenshotSummary(original_render.screenshot)
+
+    results = []
+    for predict_render in predict_renders:
+        try:
+            predict = ScreenshotSummary(predict_render.screenshot)
+            blank = predict.content < VISUAL_PREFILTER_MIN_CONTENT <= original.content
+            layout_similarity = hash_similarity(predict.hash, original.hash)
+            color_similarity = compare_histograms(predict.histogram, original.histogram)
+            different = (
+                layout_similarity < VISUAL_PREFILTER_MIN_HASH_SIMILARITY
+                and color_similarity < VISUAL_PREFILTER_MIN_HISTOGRAM_SIMILARITY
+            )
+            if blank or different:
+                bt.logging.debug(
+                    f"Prefilter rejected {predict_render.html_path}: content {predict.content:.4f}, "
+                    f"layout similarity {layout_similarity:.3f}, color similarity {color_similarity:.3f}"
+                )
+            results.append(not (blank or different))
+        except Exception as e:
+            # The full metrics decide on screenshots the prefilter can't read
+            bt.logging.error(f"Error prefiltering {predict_render.html_path}: {e}")
+            results.append(True)
+
+    return np.array(results, dtype=bool)
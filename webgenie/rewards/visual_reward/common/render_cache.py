@@ -0,0 +1,216 @@
+import bittensor as bt
+import hashlib
+import io
+import json
+import numpy as np
+import os
+import pickle
+from collections import OrderedDict
+from PIL import Image
+
+from webgenie.constants import (
+    MAX_RENDER_HEIGHT,
+    RENDER_CACHE_DIR,
+    RENDER_CACHE_DISK_SIZE,
+    RENDER_CACHE_MEMORY_SIZE,
+    RENDER_HEIGHT_MODE,
+    RENDER_VIEWPORT,
+)
+from webgenie.helpers.assets import write_file_atomically
+
+
+# Everything besides the html which changes the output of a render.
+# Bump the version when the render output changes, so stale entries are not reused.
+RENDER_SETTINGS = {
+    "version": 3,
+    "viewport": RENDER_VIEWPORT,
+    "full_page": True,
+    "animations": "disabled",
+    "max_height": MAX_RENDER_HEIGHT,
+    "height_mode": RENDER_HEIGHT_MODE,
+}
+
+
+def render_cache_key(html_content: str, settings: dict = RENDER_SETTINGS) -> str:
+    """
+    The sha256 of the html content and the render settings.
+    """
+    digest = hashlib.sha256(html_content.encode())
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+# Screenshot fields of a render, stored as png on disk
+IMAGE_FIELDS = ["screenshot", "inpainted_screenshot"]
+
+
+def encode_image(image: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    # The lowest compression level is much faster and almost as small on screenshots
+    Image.fromarray(image).save(buffer, format="PNG", compress_level=1)
+    return buffer.getvalue()
+
+
+def decode_image(data: bytes) -> np.ndarray:
+    with Image.open(io.BytesIO(data)) as img:
+        return np.array(img.convert("RGB"))
+
+
+def dump_render(render) -> bytes:
+    """
+    Pickle a render with its screenshots compressed as png, raw screenshots take up to tens of MB.
+    """
+    images = {name: getattr(render, name) for name in IMAGE_FIELDS if getattr(render, name) is not None}
+    entry = {
+        "render": render.model_copy(update={name: None for name in images}),
+        "images": {name: encode_image(image) for name, image in images.items()},
+    }
+    return pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_render(data: bytes):
+    entry = pickle.loads(data)
+    images = {name: decode_image(image) for name, image in entry["images"].items()}
+    return entry["render"].model_copy(update=images)
+
+
+def render_size(render) -> int:
+    """
+    The bytes of a render in memory, its screenshots and the pickled rest.
+    """
+    images = {name: getattr(render, name) for name in IMAGE_FIELDS if getattr(render, name) is not None}
+    stripped = render.model_copy(update={name: None for name in images})
+    return len(pickle.dumps(stripped, protocol=pickle.HIGHEST_PROTOCOL)) + sum(image.nbytes for image in images.values())
+
+
+class RenderCache:
+    """
+    A two level LRU cache of renders keyed by `render_cache_key`.
+    The most recently used renders are kept in memory. Persisted renders are also pickled to disk,
+    with png screenshots, so they are shared between processes.
+    """
+    def __init__(
+        self,
+        cache_dir: str = RENDER_CACHE_DIR,
+        max_memory_size: int = RENDER_CACHE_MEMORY_SIZE,
+        max_disk_size: int = RENDER_CACHE_DISK_SIZE,
+    ):
+        self.cache_dir = cache_dir
+        self.max_memory_size = max_memory_size
+        self.max_disk_size = max_disk_size
+        self.memory = OrderedDict()
+        self.memory_size = 0
+        # Bytes of the disk cache, counted once and then kept up to date with the writes of this process
+        self.disk_size = None
+
+    def _path(self, key: str) -> str:
+        return f"{self.cache_dir}/{key[:2]}/{key}.pkl"
+
+    def _remember(self, key: str, render, size: int):
+        if key in self.memory:
+            self.memory_size -= self.memory.pop(key)[1]
+        if size > self.max_memory_size:
+            return
+        self.memory[key] = (render, size)
+        self.memory_size += size
+        while self.memory_size > self.max_memory_size:
+            _, (_, evicted_size) = self.memory.popitem(last=False)
+            self.memory_size -= evicted_size
+
+    def get(self, key: str):
+        """
+        Get the cached render of the key, or None if it is not cached.
+        """
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return self.memory[key][0]
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            render = load_render(data)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            bt.logging.warning(f"Corrupted render cache entry {key}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        try:
+            # Mark the entry as recently used for the disk eviction
+            os.utime(path)
+        except OSError:
+            pass
+        self._remember(key, render, render_size(render))
+        return render
+
+    def put(self, key: str, render, persist: bool = False):
+        """
+        Cache the render in memory, and on disk if `persist`.
+        Only persist renders other processes will ask for, like the ground truth of a task.
+        """
+        self._remember(key, render, render_size(render))
+        if persist:
+            self.persist(key, render)
+
+    def persist(self, key: str, render):
+        """
+        Write the render to disk, unless it is already there.
+        """
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        data = dump_render(render)
+        if len(data) > self.max_disk_size:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_file_atomically(path, data)
+            self._evict_disk(len(data))
+        except OSError as e:
+            bt.logging.warning(f"Error caching render {key}: {e}")
+
+    def _evict_disk(self, written_size: int):
+        if self.disk_size is None:
+            self.disk_size = sum(size for _, size, _ in self._disk_entries())
+        else:
+            self.disk_size += written_size
+        if self.disk_size <= self.max_disk_size:
+            return
+
+        # Other processes write to the same directory, recount before evicting
+        entries = self._disk_entries()
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_disk_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size -= size
+        self.disk_size = total_size
+
+    def _disk_entries(self):
+        """
+        The (mtime, size, path) of the cached renders on disk.
+        """
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for file in files:
+                if not file.endswith(".pkl"):
+                    continue
+                path = os.path.join(root, file)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+
+render_cache = RenderCache()
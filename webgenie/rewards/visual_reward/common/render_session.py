@@ -0,0 +1,192 @@
+import bittensor as bt
+import asyncio
+import os
+import uuid
+from pydantic import BaseModel, Field
+from typing import Any, List
+
+from webgenie.constants import (
+    PAGE_READY_TIMEOUT,
+    RENDER_CONCURRENCY,
+    RENDER_TIMEOUT,
+    WORK_DIR,
+)
+from webgenie.rewards.visual_reward.common.browser import lease_page, load_page
+from webgenie.rewards.visual_reward.common.extract_html_elements import (
+    HTMLElement,
+    extract_html_elements,
+    preprocess_html_elements,
+)
+from webgenie.rewards.visual_reward.common.inpaint_image import erase_texts
+from webgenie.rewards.visual_reward.common.integral_image import IntegralImage, covered_area
+from webgenie.rewards.visual_reward.common.render_cache import render_cache, render_cache_key
+from webgenie.rewards.visual_reward.common.sift import ScreenshotSiftExtractor
+from webgenie.rewards.visual_reward.common.take_screenshot import (
+    blank_image,
+    capture_bounded_screenshot,
+)
+
+
+class RenderResult(BaseModel):
+    html_path: str = Field(default="", description="The path of the rendered html file")
+    screenshot: Any = Field(default=None, description="The full page screenshot as an RGB uint8 array")
+    inpainted_screenshot: Any = Field(default=None, description="The screenshot with erased texts as an RGB uint8 array")
+    text_elements: List[HTMLElement] = Field(default=[], description="The leaf elements with texts")
+    button_elements: List[HTMLElement] = Field(default=[], description="The button elements")
+    input_elements: List[HTMLElement] = Field(default=[], description="The input elements")
+    anchor_elements: List[HTMLElement] = Field(default=[], description="The anchor elements")
+    page_height: int = Field(default=0, description="The height of the whole page")
+    truncated: bool = Field(default=False, description="Whether the screenshots are cut at the max render height")
+
+
+class RenderSession:
+    """
+    Loads an html file in the browser once and produces everything the visual metrics need:
+    the full page screenshot, the html elements and the screenshot with erased texts.
+    Screenshots are decoded once and kept in memory, nothing is written next to the html file.
+    Renders are cached by the content of the html, so the same html is rendered only once.
+    Persisted renders are also cached on disk for the other processes.
+    """
+    def __init__(self, html_path: str, ready_timeout: int = PAGE_READY_TIMEOUT, persist: bool = False):
+        self.html_path = html_path
+        self.persist = persist
+        self.url = f"file://{os.path.abspath(html_path)}"
+        self.ready_timeout = ready_timeout
+        with open(html_path, "r") as f:
+            self.cache_key = render_cache_key(f.read())
+
+    async def _render_page(self, images: dict, elements: dict) -> bool:
+        async with lease_page() as page:
+            await load_page(page, self.url, ready_timeout=self.ready_timeout)
+
+            images["screenshot"], images["page_height"] = await capture_bounded_screenshot(page)
+            H, W = images["screenshot"].shape[:2]
+            if images["page_height"] > H:
+                bt.logging.warning(f"{self.html_path} is {images['page_height']}px tall, truncated to {H}px")
+
+            # Elements are extracted before erasing the texts, as erasing changes their colors
+            try:
+                (
+                    elements["text"],
+                    elements["button"],
+                    elements["input"],
+                    elements["anchor"],
+                ) = await extract_html_elements(page, W, H)
+            except Exception as e:
+                bt.logging.error(f"Error extracting html elements from {self.html_path}: {e}")
+                extracted = False
+            else:
+                extracted = True
+
+            # Elements below the truncated screenshot are not visible to the metrics
+            if images["page_height"] > H:
+                for name in elements:
+                    elements[name] = [element for element in elements[name] if element.bounding_box["y"] < H]
+
+            await erase_texts(page)
+            images["inpainted_screenshot"], _ = await capture_bounded_screenshot(page)
+            return extracted
+
+    async def render(self, timeout: int = RENDER_TIMEOUT) -> RenderResult:
+        """
+        Render the html file, giving up after `timeout` seconds.
+        A failed or timed out render produces blank screenshots instead of raising.
+        Only complete renders are cached.
+        """
+        cached = render_cache.get(self.cache_key)
+        if cached is not None:
+            if self.persist:
+                # The render may only be in the memory cache of this process
+                render_cache.persist(self.cache_key, cached)
+            return cached.model_copy(update={"html_path": self.html_path})
+
+        images = {"screenshot": None, "inpainted_screenshot": None, "page_height": 0}
+        elements = {"text": [], "button": [], "input": [], "anchor": []}
+        is_complete = False
+        try:
+            is_complete = await asyncio.wait_for(self._render_page(images, elements), timeout=timeout)
+        except asyncio.TimeoutError:
+            bt.logging.error(f"Timed out rendering {self.html_path} after {timeout}s. Generating blank images.")
+        except Exception as e:
+            bt.logging.error(f"Failed to render {self.html_path} due to: {e}. Generating blank images.")
+
+        for name in ["screenshot", "inpainted_screenshot"]:
+            if images[name] is None:
+                images[name] = blank_image()
+
+        # The features of the screenshot are shared by the element lists and cached with the render
+        sift_extractor = ScreenshotSiftExtractor(images["screenshot"])
+        # Building the summed-area table costs about as much as averaging the whole screenshot,
+        # it only pays off when the elements cover the screenshot more than once
+        integral_image = None
+        height, width = images["screenshot"].shape[:2]
+        if covered_area(elements["button"] + elements["input"] + elements["anchor"]) > height * width:
+            integral_image = IntegralImage(images["screenshot"])
+        for name in ["button", "input", "anchor"]:
+            preprocess_html_elements(images["screenshot"], elements[name], sift_extractor, integral_image)
+
+        result = RenderResult(
+            html_path=self.html_path,
+            screenshot=images["screenshot"],
+            inpainted_screenshot=images["inpainted_screenshot"],
+            text_elements=elements["text"],
+            button_elements=elements["button"],
+            input_elements=elements["input"],
+            anchor_elements=elements["anchor"],
+            page_height=images["page_height"],
+            truncated=images["page_height"] > images["screenshot"].shape[0],
+        )
+        if is_complete:
+            render_cache.put(self.cache_key, result.model_copy(update={"html_path": ""}), persist=self.persist)
+        return result
+
+
+async def render_html_files(
+    html_paths: List[str],
+    concurrency: int = RENDER_CONCURRENCY,
+    timeout: int = RENDER_TIMEOUT,
+    persist: List[bool] = None,
+) -> List[RenderResult]:
+    """
+    Render the html files in parallel tabs, with at most `concurrency` pages at a time.
+    Each render has its own timeout and a failing page does not affect the others.
+    Files with the same content are rendered once. The results are in the same order as `html_paths`.
+    `persist` tells which renders to also cache on disk, none by default.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def render_one(session: RenderSession) -> RenderResult:
+        async with semaphore:
+            return await session.render(timeout)
+
+    persist = persist or [False] * len(html_paths)
+    sessions = [RenderSession(html_path, persist=keep) for html_path, keep in zip(html_paths, persist)]
+    unique_sessions = {}
+    for session in sessions:
+        unique_session = unique_sessions.setdefault(session.cache_key, session)
+        unique_session.persist = unique_session.persist or session.persist
+    renders = await asyncio.gather(*[render_one(session) for session in unique_sessions.values()])
+    renders = dict(zip(unique_sessions.keys(), renders))
+    return [
+        renders[session.cache_key].model_copy(update={"html_path": session.html_path})
+        for session in sessions
+    ]
+
+
+async def render_html(
+    html_content: str,
+    ready_timeout: int = PAGE_READY_TIMEOUT,
+    timeout: int = RENDER_TIMEOUT,
+    persist: bool = False,
+) -> RenderResult:
+    """
+    Render html content through the render cache, also caching it on disk if `persist`.
+    """
+    os.makedirs(WORK_DIR, exist_ok=True)
+    html_path = f"{WORK_DIR}/render_{uuid.uuid4()}.html"
+    with open(html_path, "w") as f:
+        f.write(html_content)
+    try:
+        return await RenderSession(html_path, ready_timeout, persist=persist).render(timeout)
+    finally:
+        os.remove(html_path)
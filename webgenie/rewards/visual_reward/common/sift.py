@@ -1,9 +1,14 @@
+import hashlib
 import numpy as np
+from collections import OrderedDict
 from skimage import io, color
 from skimage.feature import SIFT
+from scipy.spatial import cKDTree
 from scipy.spatial.distance import cdist
 from scipy.optimize import linear_sum_assignment
 
+from webgenie.constants import SIFT_MATCHER, SIFT_MATCH_CACHE_SIZE
+
 
 def extract_sift_from_roi(gray_image, roi):
     # ROI: (x, y, w, h)
@@ -22,12 +27,38 @@ def extract_sift_from_roi(gray_image, roi):
     return keypoints, descriptors
 
 
-def match_sift_features(kp1, desc1, kp2, desc2, distance_metric="euclidean", threshold=0.75):
-    if (desc1 is None or len(desc1) == 0) and (desc2 is None or len(desc2) == 0):
-        return 1
-    elif (desc1 is None or len(desc1) == 0) or (desc2 is None or len(desc2) == 0):
-        return 0
+class ScreenshotSiftExtractor:
+    """
+    Extracts the sift features of regions of a screenshot for all of its html elements.
+    The screenshot is converted to grayscale once, and each distinct region is extracted once.
+    """
+    def __init__(self, color_image):
+        self.color_image = color_image
+        self._gray_image = None
+        self.features = {}
+
+    @property
+    def gray_image(self):
+        if self._gray_image is None:
+            self._gray_image = color.rgb2gray(self.color_image)
+        return self._gray_image
 
+    def extract(self, roi):
+        """
+        The keypoints and descriptors of the (x, y, w, h) region, or (None, None) if they can't be extracted.
+        """
+        if roi not in self.features:
+            try:
+                self.features[roi] = extract_sift_from_roi(self.gray_image, roi)
+            except Exception:
+                self.features[roi] = (None, None)
+        return self.features[roi]
+
+
+def count_hungarian_matches(desc1, desc2, distance_metric="euclidean", threshold=0.75):
+    """
+    The number of pairs closer than the threshold in the optimal assignment of the descriptors.
+    """
     # Compute the pairwise distance matrix between descriptors
     cost_matrix = cdist(desc1, desc2, metric=distance_metric)
 
@@ -35,9 +66,52 @@ def match_sift_features(kp1, desc1, kp2, desc2, distance_metric="euclidean", thr
     row_indices, col_indices = linear_sum_assignment(cost_matrix)
 
     # Apply a threshold to filter out matches with large distances
-    matches = []
-    for i, j in zip(row_indices, col_indices):
-        if cost_matrix[i, j] < threshold:
-            matches.append((i, j))
+    return int(np.count_nonzero(cost_matrix[row_indices, col_indices] < threshold))
+
+
+def count_kdtree_matches(desc1, desc2, threshold=0.75):
+    """
+    The number of one to one euclidean nearest neighbour matches closer than the threshold.
+    Each descriptor of desc1 is matched to its nearest neighbour in a kd-tree of desc2,
+    a neighbour claimed by several descriptors is a single match.
+    """
+    tree = cKDTree(np.asarray(desc2, dtype=np.float64))
+    distances, indices = tree.query(np.asarray(desc1, dtype=np.float64), k=1, distance_upper_bound=threshold)
+    return len(np.unique(indices[distances < threshold]))
+
+sift_match_cache = OrderedDict()
+
+
+def sift_match_cache_key(kp1, desc1, kp2, desc2, distance_metric, threshold, matcher):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{matcher}/{distance_metric}/{threshold}/{len(kp1)}/{len(kp2)}".encode())
+    for desc in [desc1, desc2]:
+        desc = np.ascontiguousarray(desc)
+        digest.update(f"{desc.shape}/{desc.dtype}".encode())
+        digest.update(desc.data)
+    return digest.digest()
+
+
+def match_sift_features(kp1, desc1, kp2, desc2, distance_metric="euclidean", threshold=0.75, matcher=SIFT_MATCHER):
+    if (desc1 is None or len(desc1) == 0) and (desc2 is None or len(desc2) == 0):
+        return 1
+    elif (desc1 is None or len(desc1) == 0) or (desc2 is None or len(desc2) == 0):
+        return 0
+
+    # The same elements are compared again for every solution, so the scores are cached by content
+    key = sift_match_cache_key(kp1, desc1, kp2, desc2, distance_metric, threshold, matcher)
+    score = sift_match_cache.get(key)
+    if score is not None:
+        sift_match_cache.move_to_end(key)
+        return score
+
+    if matcher == "kdtree" and distance_metric == "euclidean":
+        match_count = count_kdtree_matches(desc1, desc2, threshold)
+    else:
+        match_count = count_hungarian_matches(desc1, desc2, distance_metric, threshold)
+    score = 1 - match_count / max(len(kp1), len(kp2))
 
-    return 1 - len(matches) / max(len(kp1), len(kp2))
+    sift_match_cache[key] = score
+    while len(sift_match_cache) > SIFT_MATCH_CACHE_SIZE:
+        sift_match_cache.popitem(last=False)
+    return score
@@ -7,7 +7,11 @@ from difflib import SequenceMatcher
 from webgenie.rewards.visual_reward.common.color_diff import color_similarity_ciede2000
 from webgenie.rewards.visual_reward.common.extract_html_elements import HTMLElement
 from webgenie.rewards.visual_reward.common.sift import match_sift_features
-from webgenie.rewards.visual_reward.common.color_diff import color_similarity_ciede2000
+from webgenie.rewards.visual_reward.common.text_similarity import unique_ratio_matrix, unique_ratio_pairs
+from webgenie.rewards.visual_reward.common.color_diff import (
+    color_similarity_ciede2000_matrix,
+    color_similarity_ciede2000_pairs,
+)
 # similarity is 1 if they are the same, 0 if they are completely different
 
 
@@ -54,3 +58,139 @@ def calculate_visual_similarity(
                                     original_element.keypoints, original_element.descriptors)
     avg_color_score = color_similarity_ciede2000(predicted_element.avg_color, original_element.avg_color)
     return sift_score * 0.5 + avg_color_score * 0.5
+
+
+# The functions below compute the similarities above for every pair of a list of predicted
+# and a list of original elements at once, as N x M matrices with the predicted elements as rows.
+
+def text_similarity_matrix(predicted_texts, original_texts):
+    """
+    `calculate_text_similarity` of every pair of texts, with the configured text similarity backend.
+    """
+    matrix = unique_ratio_matrix(predicted_texts, original_texts)
+    predicted_empty = np.array([not text for text in predicted_texts], dtype=bool)[:, None]
+    original_empty = np.array([not text for text in original_texts], dtype=bool)[None, :]
+    matrix = np.where(predicted_empty | original_empty, 0.0, matrix)
+    return np.where(predicted_empty & original_empty, 1.0, matrix)
+
+
+def bounding_box_array(elements):
+    return np.array([
+        [
+            element.scaled_bounding_box["x"],
+            element.scaled_bounding_box["y"],
+            element.scaled_bounding_box["width"],
+            element.scaled_bounding_box["height"],
+        ]
+        for element in elements
+    ], dtype=np.float64).reshape(-1, 4)
+
+
+def block_similarity_matrix(predicted_elements, original_elements):
+    """
+    `calculate_block_similarity` of every pair of elements, from broadcasted bounding boxes.
+    """
+    predicted = bounding_box_array(predicted_elements)
+    original = bounding_box_array(original_elements)
+    px, py, pw, ph = (predicted[:, i][:, None] for i in range(4))
+    ox, oy, ow, oh = (original[:, i][None, :] for i in range(4))
+
+    # Same operand order as calculate_block_similarity, so the results are identical
+    x_shift = np.abs(ox - px)
+    y_shift = np.abs(oy - py)
+    xx_shift = np.abs(ox + ow - px - pw)
+    yy_shift = np.abs(oy + oh - py - ph)
+
+    return 1 - (x_shift + y_shift + xx_shift + yy_shift) / 4
+
+
+def color_similarity_matrix(predicted_elements, original_elements):
+    """
+    `calculate_color_similarity` of every pair of elements.
+    """
+    return color_similarity_ciede2000_matrix(
+        [element.color for element in predicted_elements],
+        [element.color for element in original_elements],
+    )
+
+
+def color_similarity_pairs(predicted_elements, original_elements):
+    """
+    `calculate_color_similarity` of the i-th predicted and the i-th original elements.
+    """
+    return color_similarity_ciede2000_pairs(
+        [element.color for element in predicted_elements],
+        [element.color for element in original_elements],
+    )
+
+
+def visual_similarity_matrix(predicted_elements, original_elements, mask=None):
+    """
+    `calculate_visual_similarity` of every pair of elements.
+    Pairs where `mask` is False are skipped and left as 0.
+    """
+    n, m = len(predicted_elements), len(original_elements)
+    if mask is None:
+        mask = np.ones((n, m), dtype=bool)
+
+    avg_color_scores = color_similarity_ciede2000_matrix(
+        [np.asarray(element.avg_color, dtype=np.float64) for element in predicted_elements],
+        [np.asarray(element.avg_color, dtype=np.float64) for element in original_elements],
+    )
+
+    sift_scores = np.zeros((n, m))
+    for i, j in zip(*np.nonzero(mask)):
+        predicted_element = predicted_elements[i]
+        original_element = original_elements[j]
+        sift_scores[i, j] = match_sift_features(predicted_element.keypoints, predicted_element.descriptors,
+                                                original_element.keypoints, original_element.descriptors)
+
+    return np.where(mask, sift_scores * 0.5 + avg_color_scores * 0.5, 0.0)
+
+
+
+# The functions below compute the similarities above only for the i-th predicted and the i-th
+# original elements of two lists of the same length, for the candidate pairs of large pages.
+
+def text_similarity_pairs(predicted_texts, original_texts):
+    """
+    `calculate_text_similarity` of the i-th predicted and the i-th original texts.
+    """
+    similarities = unique_ratio_pairs(predicted_texts, original_texts)
+    predicted_empty = np.array([not text for text in predicted_texts], dtype=bool)
+    original_empty = np.array([not text for text in original_texts], dtype=bool)
+    similarities = np.where(predicted_empty | original_empty, 0.0, similarities)
+    return np.where(predicted_empty & original_empty, 1.0, similarities)
+
+
+def block_similarity_pairs(predicted_elements, original_elements):
+    """
+    `calculate_block_similarity` of the i-th predicted and the i-th original elements.
+    """
+    predicted = bounding_box_array(predicted_elements)
+    original = bounding_box_array(original_elements)
+    px, py, pw, ph = predicted.T
+    ox, oy, ow, oh = original.T
+
+    x_shift = np.abs(ox - px)
+    y_shift = np.abs(oy - py)
+    xx_shift = np.abs(ox + ow - px - pw)
+    yy_shift = np.abs(oy + oh - py - ph)
+
+    return 1 - (x_shift + y_shift + xx_shift + yy_shift) / 4
+
+
+def visual_similarity_pairs(predicted_elements, original_elements):
+    """
+    `calculate_visual_similarity` of the i-th predicted and the i-th original elements.
+    """
+    avg_color_scores = color_similarity_ciede2000_pairs(
+        [np.asarray(element.avg_color, dtype=np.float64) for element in predicted_elements],
+        [np.asarray(element.avg_color, dtype=np.float64) for element in original_elements],
+    )
+    sift_scores = np.array([
+        match_sift_features(predicted_element.keypoints, predicted_element.descriptors,
+                            original_element.keypoints, original_element.descriptors)
+        for predicted_element, original_element in zip(predicted_elements, original_elements)
+    ], dtype=np.float64)
+    return sift_scores * 0.5 + avg_color_scores * 0.5
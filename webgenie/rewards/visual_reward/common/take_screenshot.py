@@ -1,42 +1,95 @@
-import bittensor as bt
-import os
+import io
+import numpy as np
+import tempfile
 from PIL import Image
+from typing import Tuple
 
 from webgenie.constants import (
-    DEFAULT_LOAD_TIME, 
     CHROME_HTML_LOAD_TIME, 
-    JAVASCRIPT_RUNNING_TIME,
+    MAX_RENDER_HEIGHT,
+    RENDER_HEIGHT_MODE,
+    RENDER_TILE_HEIGHT,
 )
-from webgenie.rewards.visual_reward.common.browser import web_player
-
-
-async def take_screenshot(url, output_file_path, load_time = DEFAULT_LOAD_TIME, overwrite = False):
-    if os.path.exists(url):
-        url = f"file:///{os.path.abspath(url)}"
-
-    if os.path.exists(output_file_path):
-        if not overwrite:
-            return
-        else:
-            os.remove(output_file_path)
-        
-    try:
-        page = await web_player["browser"].new_page()
-        await page.goto(url, timeout=CHROME_HTML_LOAD_TIME)
-
-        await page.wait_for_load_state('networkidle')
-        await page.wait_for_timeout(JAVASCRIPT_RUNNING_TIME)
-        
-        await page.screenshot(
-            path=output_file_path, 
-            full_page=True, 
-            animations='disabled', 
-            timeout=CHROME_HTML_LOAD_TIME,
-        )
-        await page.close()
-    except Exception as e:
-        bt.logging.error(f"Failed to take screenshot due to: {e}. Generating a blank image.")
-        # Generate a blank image 
-        img = Image.new('RGB', (1280, 960), color = 'white')
-        img.save(output_file_path)
-    
\ No newline at end of file
+
+
+def blank_image() -> np.ndarray:
+    return np.full((960, 1280, 3), 255, dtype=np.uint8)
+
+
+def decode_screenshot(png_bytes: bytes) -> np.ndarray:
+    """
+    Decode png screenshot bytes into an RGB uint8 array of shape (H, W, 3).
+    """
+    with Image.open(io.BytesIO(png_bytes)) as img:
+        return np.array(img.convert("RGB"))
+
+
+async def capture_screenshot(page) -> bytes:
+    """
+    Capture a full page screenshot and return its png bytes.
+    """
+    return await page.screenshot(
+        full_page=True, 
+        animations='disabled', 
+        timeout=CHROME_HTML_LOAD_TIME,
+    )
+
+
+PAGE_SIZE_SCRIPT = """
+() => {
+    const root = document.documentElement;
+    const body = document.body;
+    return [
+        Math.max(root.scrollWidth, body ? body.scrollWidth : 0),
+        Math.max(root.scrollHeight, body ? body.scrollHeight : 0),
+    ];
+}
+"""
+
+
+async def capture_clip(page, x: int, y: int, width: int, height: int) -> np.ndarray:
+    png_bytes = await page.screenshot(
+        full_page=True,
+        clip={"x": x, "y": y, "width": width, "height": height},
+        animations='disabled',
+        timeout=CHROME_HTML_LOAD_TIME,
+    )
+    return decode_screenshot(png_bytes)
+
+
+async def capture_tiles(page, width: int, height: int, tile_height: int = RENDER_TILE_HEIGHT) -> np.ndarray:
+    """
+    Capture the top `height` pixels of the page tile by tile and stitch them
+    into a memory mapped array, so the whole image is never held on the heap.
+    """
+    with tempfile.TemporaryFile() as f:
+        image = np.memmap(f, dtype=np.uint8, mode="w+", shape=(height, width, 3))
+    for y in range(0, height, tile_height):
+        tile = await capture_clip(page, 0, y, width, min(tile_height, height - y))
+        tile_h, tile_w = min(tile.shape[0], height - y), min(tile.shape[1], width)
+        image[y:y + tile_h, :tile_w] = tile[:tile_h, :tile_w]
+    return image
+
+
+async def capture_bounded_screenshot(
+    page,
+    max_height: int = MAX_RENDER_HEIGHT,
+    mode: str = RENDER_HEIGHT_MODE,
+) -> Tuple[np.ndarray, int]:
+    """
+    Capture a full page screenshot which is at most `max_height` pixels tall.
+    Taller pages are either clipped or captured in tiles, depending on `mode`.
+    Returns the RGB image and the height of the whole page.
+    """
+    width, height = await page.evaluate(PAGE_SIZE_SCRIPT)
+    width = max(1, int(width))
+    if height <= max_height:
+        image = decode_screenshot(await capture_screenshot(page))
+        # Guard against a page which grew after it was measured
+        return image[:max_height], max(height, image.shape[0])
+
+    if mode == "tiled":
+        image = await capture_tiles(page, width, max_height)
+    else:
+        image = await capture_clip(page, 0, 0, width, max_height)
+    return image, height
@@ -0,0 +1,96 @@
+import bittensor as bt
+import numpy as np
+from difflib import SequenceMatcher
+from typing import List
+
+from webgenie.constants import TEXT_SIMILARITY_BACKEND
+
+
+class DifflibTextSimilarity:
+    """
+    The ratio of difflib.SequenceMatcher, which the visual scores were designed with.
+    """
+    name = "difflib"
+
+    def ratio_matrix(self, texts1: List[str], texts2: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts1), len(texts2)))
+        matcher = SequenceMatcher(None)
+        for j, text2 in enumerate(texts2):
+            # SequenceMatcher caches what it learns about the second sequence
+            matcher.set_seq2(text2)
+            for i, text1 in enumerate(texts1):
+                matcher.set_seq1(text1)
+                matrix[i, j] = matcher.ratio()
+        return matrix
+
+    def ratio_pairs(self, texts1: List[str], texts2: List[str]) -> np.ndarray:
+        return np.array([SequenceMatcher(None, text1, text2).ratio() for text1, text2 in zip(texts1, texts2)], dtype=np.float64)
+
+
+class RapidfuzzTextSimilarity:
+    """
+    The normalized indel similarity of rapidfuzz, computed for the whole matrix in C.
+    It is close to the difflib ratio but not equal to it.
+    """
+    name = "rapidfuzz"
+
+    def __init__(self):
+        from rapidfuzz import fuzz, process
+        self.fuzz = fuzz
+        self.process = process
+
+    def ratio_matrix(self, texts1: List[str], texts2: List[str]) -> np.ndarray:
+        if not texts1 or not texts2:
+            return np.zeros((len(texts1), len(texts2)))
+        matrix = self.process.cdist(texts1, texts2, scorer=self.fuzz.ratio, dtype=np.float64)
+        return np.asarray(matrix) / 100
+
+    def ratio_pairs(self, texts1: List[str], texts2: List[str]) -> np.ndarray:
+        return np.array([self.fuzz.ratio(text1, text2) for text1, text2 in zip(texts1, texts2)], dtype=np.float64) / 100
+
+
+TEXT_SIMILARITY_BACKENDS = {
+    DifflibTextSimilarity.name: DifflibTextSimilarity,
+    RapidfuzzTextSimilarity.name: RapidfuzzTextSimilarity,
+}
+
+text_similarity_backends = {}
+
+
+def get_text_similarity(name: str = TEXT_SIMILARITY_BACKEND):
+    """
+    Get the text similarity backend by name, falling back to difflib if it is not available.
+    """
+    if name not in text_similarity_backends:
+        try:
+            text_similarity_backends[name] = TEXT_SIMILARITY_BACKENDS[name]()
+        except Exception as e:
+            bt.logging.warning(f"Text similarity backend {name} is not available, using difflib: {e}")
+            text_similarity_backends[name] = DifflibTextSimilarity()
+    return text_similarity_backends[name]
+
+
+def unique_ratio_matrix(texts1: List[str], texts2: List[str], backend=None) -> np.ndarray:
+    """
+    The ratio of every pair of texts, comparing each distinct pair once.
+    """
+    backend = backend or get_text_similarity()
+    unique_texts1 = list(dict.fromkeys(texts1))
+    unique_texts2 = list(dict.fromkeys(texts2))
+    matrix = backend.ratio_matrix(unique_texts1, unique_texts2)
+    index1 = {text: i for i, text in enumerate(unique_texts1)}
+    index2 = {text: j for j, text in enumerate(unique_texts2)}
+    rows = np.array([index1[text] for text in texts1], dtype=int)
+    cols = np.array([index2[text] for text in texts2], dtype=int)
+    return matrix[np.ix_(rows, cols)]
+
+
+def unique_ratio_pairs(texts1: List[str], texts2: List[str], backend=None) -> np.ndarray:
+    """
+    The ratio of the i-th texts of both lists, comparing each distinct pair once.
+    """
+    backend = backend or get_text_similarity()
+    unique_pairs = list(dict.fromkeys(zip(texts1, texts2)))
+    ratios = backend.ratio_pairs([text1 for text1, _ in unique_pairs], [text2 for _, text2 in unique_pairs])
+    index = {pair: i for i, pair in enumerate(unique_pairs)}
+    return ratios[np.array([index[pair] for pair in zip(texts1, texts2)], dtype=int)]
@@ -0,0 +1,195 @@
+import bittensor as bt
+import clip
+import numpy as np
+import os
+import torch
+import uuid
+from PIL import Image
+from typing import List
+
+from webgenie.constants import (
+    CLIP_BACKEND,
+    CLIP_BATCH_SIZE,
+    CLIP_MODEL_NAME,
+    CLIP_ONNX_DIR,
+    CLIP_ONNX_THREADS,
+)
+from webgenie.rewards.visual_reward.high_level_matching_score.embedding_store import (
+    EmbeddingStore,
+    embedding_store,
+    image_hash,
+)
+
+
+clip_model = {
+    "pid": None,
+    "model": None,
+    "preprocess": None,
+    "encoder": None,
+}
+
+
+def rescale(image: np.ndarray) -> Image.Image:
+    # Wrap the RGB image array
+    with Image.fromarray(np.asarray(image)) as img:
+        width, height = img.size
+
+        # Determine which side is shorter
+        if width < height:
+            # Width is shorter, scale height to match the width
+            new_size = (width, width)
+        else:
+            # Height is shorter, scale width to match the height
+            new_size = (height, height)
+
+        # Resize the image while maintaining aspect ratio
+        img_resized = img.resize(new_size, Image.LANCZOS)
+
+        return img_resized
+
+
+class TorchImageEncoder:
+    """
+    Encodes preprocessed image batches with the CLIP model in pytorch.
+    """
+    name = "torch"
+
+    def __init__(self, model):
+        self.model = model
+
+    def __call__(self, batch: torch.Tensor) -> np.ndarray:
+        with torch.inference_mode():
+            features = self.model.encode_image(batch).float()
+            features /= features.norm(dim=-1, keepdim=True)
+        return features.numpy()
+
+
+def export_image_encoder(model, model_dir: str = CLIP_ONNX_DIR) -> str:
+    """
+    Export the image tower of the CLIP model to onnx and quantize its weights to int8.
+    Returns the path of the quantized model, exporting it only if it does not exist yet.
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    model_name = CLIP_MODEL_NAME.replace("/", "_")
+    quantized_path = f"{model_dir}/{model_name}_int8.onnx"
+    if os.path.exists(quantized_path):
+        return quantized_path
+
+    os.makedirs(model_dir, exist_ok=True)
+    # Other workers may export at the same time, so export to unique paths and move into place
+    export_path = f"{model_dir}/{model_name}_{uuid.uuid4()}.onnx"
+    temp_quantized_path = f"{model_dir}/{model_name}_int8_{uuid.uuid4()}.onnx"
+    resolution = model.visual.input_resolution
+    try:
+        torch.onnx.export(
+            model.visual,
+            torch.randn(1, 3, resolution, resolution),
+            export_path,
+            input_names=["image"],
+            output_names=["embedding"],
+            dynamic_axes={"image": {0: "batch"}, "embedding": {0: "batch"}},
+            dynamo=False,
+        )
+        quantize_dynamic(export_path, temp_quantized_path, weight_type=QuantType.QInt8)
+        os.replace(temp_quantized_path, quantized_path)
+    finally:
+        for path in [export_path, temp_quantized_path]:
+            if os.path.exists(path):
+                os.remove(path)
+    return quantized_path
+
+
+class OnnxImageEncoder:
+    """
+    Encodes preprocessed image batches with the int8 quantized CLIP image tower in onnxruntime.
+    """
+    name = "onnx"
+
+    def __init__(self, model, num_threads: int = CLIP_ONNX_THREADS):
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = max(1, num_threads)
+        options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(
+            export_image_encoder(model),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, batch: torch.Tensor) -> np.ndarray:
+        features = self.session.run(None, {self.input_name: batch.numpy()})[0].astype(np.float32)
+        return features / np.linalg.norm(features, axis=-1, keepdims=True)
+
+
+def create_image_encoder(model, backend: str = CLIP_BACKEND):
+    if backend == "onnx":
+        try:
+            return OnnxImageEncoder(model)
+        except Exception as e:
+            bt.logging.warning(f"Error creating the onnx clip encoder, falling back to torch: {e}")
+    return TorchImageEncoder(model)
+
+
+def get_clip_model():
+    """
+    Get the CLIP model, its preprocess and the image encoder of the current process.
+    They are loaded and warmed up on the first call, and reused afterwards.
+    """
+    if clip_model["model"] is None or clip_model["pid"] != os.getpid():
+        bt.logging.debug(f"Loading CLIP model {CLIP_MODEL_NAME} with the {CLIP_BACKEND} backend")
+        model, preprocess = clip.load(CLIP_MODEL_NAME, device="cpu")
+        model.eval()
+        encoder = create_image_encoder(model)
+        # Warm up, the first forward pass is much slower than the following ones
+        encoder(preprocess(Image.new("RGB", (224, 224))).unsqueeze(0))
+        clip_model["model"] = model
+        clip_model["preprocess"] = preprocess
+        clip_model["encoder"] = encoder
+        clip_model["pid"] = os.getpid()
+    return clip_model["model"], clip_model["preprocess"], clip_model["encoder"]
+
+
+def encode_images(images: List[np.ndarray], batch_size: int = CLIP_BATCH_SIZE) -> np.ndarray:
+    """
+    Encode RGB image arrays into normalized CLIP embeddings of shape (N, D), in batches.
+    """
+    _, preprocess, encoder = get_clip_model()
+    embeddings = []
+    for start in range(0, len(images), batch_size):
+        batch = torch.stack([preprocess(rescale(image)) for image in images[start:start + batch_size]])
+        embeddings.append(encoder(batch))
+    if not embeddings:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.concatenate(embeddings)
+
+
+def embed_images(images: List[np.ndarray], store: EmbeddingStore = embedding_store) -> np.ndarray:
+    """
+    Get the normalized CLIP embeddings of the images, only encoding the ones
+    whose content is not in the embedding store yet.
+    """
+    # Embeddings of different backends differ slightly, so they are stored apart
+    _, _, encoder = get_clip_model()
+    keys = [image_hash(image, f"{CLIP_MODEL_NAME}/{encoder.name}") for image in images]
+    embeddings = {}
+    missing_images = {}
+    for key, image in zip(keys, images):
+        if key in embeddings or key in missing_images:
+            continue
+        embedding = store.get(key)
+        if embedding is None:
+            missing_images[key] = image
+        else:
+            embeddings[key] = embedding
+
+    if missing_images:
+        encoded = dict(zip(missing_images.keys(), encode_images(list(missing_images.values()))))
+        store.put_many(encoded)
+        embeddings.update(encoded)
+
+    if not keys:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.stack([embeddings[key] for key in keys])
@@ -0,0 +1,212 @@
+import bittensor as bt
+import fcntl
+import hashlib
+import json
+import numpy as np
+import os
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from webgenie.constants import (
+    CLIP_EMBEDDING_CACHE_SIZE,
+    CLIP_EMBEDDING_STORE_DIR,
+    CLIP_MODEL_NAME,
+)
+from webgenie.helpers.assets import write_file_atomically
+
+
+# Bump when the layout of the persisted store changes, older stores are then recreated
+STORE_VERSION = 2
+
+
+def image_hash(image: np.ndarray, namespace: str = CLIP_MODEL_NAME) -> str:
+    """
+    The sha256 of the image content and shape, prefixed by the namespace of the embeddings.
+    """
+    image = np.ascontiguousarray(image)
+    digest = hashlib.sha256(namespace.encode())
+    digest.update(str(image.shape).encode())
+    digest.update(image.data)
+    return digest.hexdigest()
+
+
+def key_tag(key: str) -> int:
+    """
+    A short hash of the key stored next to its row, 0 marks a row being written.
+    """
+    return int(hashlib.sha256(key.encode()).hexdigest()[:16], 16) | 1
+
+
+class EmbeddingStore:
+    """
+    Embeddings keyed by the hash of the image they were computed from.
+    The most recently used embeddings are kept in memory. When `store_dir` is set they are
+    also persisted in a memory mapped float16 matrix used as a ring buffer of `capacity` rows,
+    so other processes and later runs can reuse them.
+    Readers don't lock the store, each row has the tag of its key so a row overwritten
+    after the index was read is a miss instead of the embedding of another image.
+    """
+    def __init__(self, store_dir: str = CLIP_EMBEDDING_STORE_DIR, capacity: int = CLIP_EMBEDDING_CACHE_SIZE):
+        self.store_dir = store_dir
+        self.capacity = max(1, capacity)
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        self.matrix = None
+        self.tags = None
+        self.index = None
+        self.index_mtime = None
+
+    @property
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.memory)}
+
+    def _remember(self, key: str, embedding: np.ndarray):
+        self.memory[key] = embedding
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.capacity:
+            self.memory.popitem(last=False)
+
+    def get(self, key: str):
+        """
+        Get the embedding of the key, or None if it is not stored.
+        """
+        embedding = self.memory.get(key)
+        if embedding is None and self.store_dir:
+            try:
+                embedding = self._load(key)
+            except Exception as e:
+                bt.logging.warning(f"Error loading embedding {key}: {e}")
+                embedding = None
+
+        if embedding is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._remember(key, embedding)
+        return embedding
+
+    def put(self, key: str, embedding: np.ndarray):
+        self.put_many({key: embedding})
+
+    def put_many(self, embeddings: dict):
+        """
+        Store the embeddings of a {key: embedding} dict, persisting them in a single write.
+        """
+        embeddings = {key: np.asarray(embedding, dtype=np.float32) for key, embedding in embeddings.items()}
+        for key, embedding in embeddings.items():
+            self._remember(key, embedding)
+        if self.store_dir and embeddings:
+            try:
+                self._save(embeddings)
+            except Exception as e:
+                bt.logging.warning(f"Error storing embeddings: {e}")
+
+    @property
+    def _index_path(self) -> str:
+        return f"{self.store_dir}/index.json"
+
+    @property
+    def _matrix_path(self) -> str:
+        return f"{self.store_dir}/embeddings.f16"
+
+    @property
+    def _tags_path(self) -> str:
+        return f"{self.store_dir}/tags.u64"
+
+    @contextmanager
+    def _locked(self):
+        os.makedirs(self.store_dir, exist_ok=True)
+        with open(f"{self.store_dir}/.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read_index(self):
+        try:
+            mtime = os.stat(self._index_path).st_mtime_ns
+        except OSError:
+            return None
+        if self.index is None or self.index_mtime != mtime:
+            with open(self._index_path, "r") as f:
+                self.index = json.load(f)
+            self.index_mtime = mtime
+            self.matrix = None
+            self.tags = None
+        return self.index
+
+    def _open_matrix(self, dim: int, mode: str):
+        if self.matrix is None or self.matrix.shape[1] != dim:
+            self.matrix = np.memmap(self._matrix_path, dtype=np.float16, mode=mode, shape=(self.capacity, dim))
+        return self.matrix
+
+    def _open_tags(self, mode: str):
+        if self.tags is None:
+            self.tags = np.memmap(self._tags_path, dtype=np.uint64, mode=mode, shape=(self.capacity,))
+        return self.tags
+
+    def _load(self, key: str):
+        index = self._read_index()
+        if index is None or index.get("version") != STORE_VERSION or key not in index["rows"]:
+            return None
+        row = index["rows"][key]
+        tag = key_tag(key)
+        tags = self._open_tags("r")
+        # The row may be rewritten by another process at any time, it is only valid
+        # if it has the tag of the key before and after reading it
+        if tags[row] != tag:
+            return None
+        embedding = np.array(self._open_matrix(index["dim"], "r")[row], dtype=np.float32)
+        if tags[row] != tag:
+            return None
+        return embedding
+
+    def _save(self, embeddings: dict):
+        dim = next(iter(embeddings.values())).shape[-1]
+        with self._locked():
+            index = self._read_index()
+            if (
+                index is None
+                or index.get("version") != STORE_VERSION
+                or index["dim"] != dim
+                or index["capacity"] != self.capacity
+            ):
+                index = {
+                    "version": STORE_VERSION,
+                    "dim": dim,
+                    "capacity": self.capacity,
+                    "next": 0,
+                    "keys": [None] * self.capacity,
+                    "rows": {},
+                }
+                np.memmap(self._matrix_path, dtype=np.float16, mode="w+", shape=(self.capacity, dim)).flush()
+                np.memmap(self._tags_path, dtype=np.uint64, mode="w+", shape=(self.capacity,)).flush()
+
+            matrix = np.memmap(self._matrix_path, dtype=np.float16, mode="r+", shape=(self.capacity, dim))
+            tags = np.memmap(self._tags_path, dtype=np.uint64, mode="r+", shape=(self.capacity,))
+            for key, embedding in embeddings.items():
+                if key in index["rows"]:
+                    continue
+                row = index["next"]
+                evicted_key = index["keys"][row]
+                if evicted_key is not None:
+                    index["rows"].pop(evicted_key, None)
+                index["keys"][row] = key
+                index["rows"][key] = row
+                index["next"] = (row + 1) % self.capacity
+                # Readers of the evicted key see the cleared tag as a miss while the row is rewritten
+                tags[row] = 0
+                matrix[row] = embedding
+                tags[row] = key_tag(key)
+            matrix.flush()
+            tags.flush()
+            write_file_atomically(self._index_path, json.dumps(index).encode())
+            self.index = None
+            self.matrix = None
+            self.tags = None
+
+
+embedding_store = EmbeddingStore()
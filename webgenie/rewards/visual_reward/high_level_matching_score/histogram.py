@@ -2,16 +2,14 @@ import bittensor as bt
 import numpy as np
 from PIL import Image
 
-from webgenie.rewards.visual_reward.common.take_screenshot import take_screenshot
-from webgenie.constants import HTML_EXTENSION, IMAGE_EXTENSION
 
 
-def compute_grayscale_histogram(image_path, bins=256):
+def compute_grayscale_histogram(image, bins=256):
     """
-    Load the image, convert to grayscale, compute histogram.
+    Convert the RGB image array to grayscale, compute histogram.
     """
-    # Load image and convert to grayscale
-    img = Image.open(image_path).convert("L")
+    # Convert to grayscale
+    img = Image.fromarray(image).convert("L")
     np_img = np.array(img)
 
     # Compute histogram (range 0-255)
@@ -33,21 +31,17 @@ def compare_histograms(hist1, hist2):
     return (corr + 1) / 2
 
 
-async def histogram_matching_score(predict_html_path_list, original_html_path):
-    original_img_path = original_html_path.replace(HTML_EXTENSION, IMAGE_EXTENSION)
-    await take_screenshot(original_html_path, original_img_path)
-    original_hist = compute_grayscale_histogram(original_img_path)
+def histogram_matching_score(predict_renders, original_render):
+    original_hist = compute_grayscale_histogram(original_render.screenshot)
     
     results = []
-    for predict_html_path in predict_html_path_list:
+    for predict_render in predict_renders:
         try:
-            predict_img_path = predict_html_path.replace(HTML_EXTENSION, IMAGE_EXTENSION)
-            await take_screenshot(predict_html_path, predict_img_path)
-            predict_hist = compute_grayscale_histogram(predict_img_path)
+            predict_hist = compute_grayscale_histogram(predict_render.screenshot)
             similarity = compare_histograms(original_hist, predict_hist)
             results.append(similarity)
         except Exception as e:
-            bt.logging.error(f"Error calculating histogram score for {predict_html_path}: {e}")
+            bt.logging.error(f"Error calculating histogram score for {predict_render.html_path}: {e}")
             results.append(0)
 
     return results
\ No newline at end of file
@@ -3,14 +3,20 @@ import asyncio
 import numpy as np
 
 from difflib import SequenceMatcher
-from scipy.optimize import linear_sum_assignment
 from skimage.metrics import structural_similarity as ssim
 
+from webgenie.rewards.visual_reward.common.assignment import assign_elements
 from webgenie.rewards.visual_reward.common.extract_html_elements import HTMLElement
 from webgenie.rewards.visual_reward.common.similarity import (
     calculate_text_similarity, 
     calculate_visual_similarity,
     calculate_block_similarity,
+    block_similarity_matrix,
+    block_similarity_pairs,
+    text_similarity_matrix,
+    text_similarity_pairs,
+    visual_similarity_matrix,
+    visual_similarity_pairs,
 )
 
 
@@ -21,23 +27,40 @@ def calculate_cost(predicted_element: HTMLElement, original_element: HTMLElement
     return text_similarity * 0.5 + visual_similarity * 0.3 + block_similarity * 0.2
 
 
+def create_similarity_matrix(predicted_elements, original_elements):
+    text_similarity = text_similarity_matrix(
+        [element.text for element in predicted_elements],
+        [element.text for element in original_elements],
+    )
+    visual_similarity = visual_similarity_matrix(predicted_elements, original_elements)
+    block_similarity = block_similarity_matrix(predicted_elements, original_elements)
+    return text_similarity * 0.5 + visual_similarity * 0.3 + block_similarity * 0.2
+
+
+def create_similarity_pairs(predicted_elements, original_elements):
+    text_similarity = text_similarity_pairs(
+        [element.text for element in predicted_elements],
+        [element.text for element in original_elements],
+    )
+    visual_similarity = visual_similarity_pairs(predicted_elements, original_elements)
+    block_similarity = block_similarity_pairs(predicted_elements, original_elements)
+    return text_similarity * 0.5 + visual_similarity * 0.3 + block_similarity * 0.2
+
+
 def create_cost_matrix(predicted_elements, original_elements):
-    n = len(predicted_elements)
-    m = len(original_elements)
-    cost_matrix = np.zeros((n, m))
-    for i in range(n):
-        for j in range(m):
-            cost_matrix[i][j] = -calculate_cost(predicted_elements[i], original_elements[j])
-    return cost_matrix
+    return -create_similarity_matrix(predicted_elements, original_elements)
 
 
 def calculate_element_matching_similarity(predicted_elements, original_elements):
     try:
-        cost_matrix = create_cost_matrix(predicted_elements, original_elements)
-        row_ind, col_ind = linear_sum_assignment(cost_matrix)
-        similarity_sum = 0
-        for i , j in zip(row_ind, col_ind):
-            similarity_sum += calculate_cost(predicted_elements[i], original_elements[j])
+        _, _, similarities = assign_elements(
+            predicted_elements,
+            original_elements,
+            create_similarity_matrix,
+            create_similarity_pairs,
+            candidate_key=lambda element: element.text,
+        )
+        similarity_sum = similarities.sum()
         
         total_count = max(len(predicted_elements), len(original_elements))
         if total_count == 0:
@@ -47,4 +70,3 @@ def calculate_element_matching_similarity(predicted_elements, original_elements)
     except Exception as e:
         bt.logging.error(f"Error calculating element matching score: {e}")
         return 0
-
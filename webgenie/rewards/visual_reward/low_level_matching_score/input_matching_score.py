@@ -3,15 +3,20 @@ import asyncio
 import numpy as np
 from math import sqrt
 from difflib import SequenceMatcher
-from scipy.optimize import linear_sum_assignment
 from skimage.metrics import structural_similarity as ssim
 
+from webgenie.rewards.visual_reward.common.assignment import assign_elements
 from webgenie.rewards.visual_reward.common.extract_html_elements import HTMLElement
 from webgenie.rewards.visual_reward.common.similarity import (
     calculate_block_similarity,
     calculate_visual_similarity,
-    calculate_color_similarity
+    calculate_color_similarity,
+    block_similarity_matrix,
+    block_similarity_pairs,
+    visual_similarity_matrix,
+    visual_similarity_pairs,
 )
+from webgenie.rewards.visual_reward.common.text_similarity import unique_ratio_matrix, unique_ratio_pairs
 
 
 def calculate_cost(predicted_element: HTMLElement, original_element: HTMLElement):
@@ -23,23 +28,58 @@ def calculate_cost(predicted_element: HTMLElement, original_element: HTMLElement
     return placeholder_similarity * 0.5 + block_similarity * 0.3 + visual_similarity * 0.2
 
 
+def create_similarity_matrix(predicted_elements, original_elements):
+    # Inputs of different types cost 0, their other similarities are not computed
+    same_type = np.array([
+        [predicted_element.input_type == original_element.input_type for original_element in original_elements]
+        for predicted_element in predicted_elements
+    ], dtype=bool).reshape(len(predicted_elements), len(original_elements))
+
+    placeholder_similarity = unique_ratio_matrix(
+        [element.input_placeholder for element in predicted_elements],
+        [element.input_placeholder for element in original_elements],
+    )
+    block_similarity = block_similarity_matrix(predicted_elements, original_elements)
+    visual_similarity = visual_similarity_matrix(predicted_elements, original_elements, same_type)
+    similarity = placeholder_similarity * 0.5 + block_similarity * 0.3 + visual_similarity * 0.2
+    return np.where(same_type, similarity, 0.0)
+
+
+def create_similarity_pairs(predicted_elements, original_elements):
+    same_type = np.array([
+        predicted_element.input_type == original_element.input_type
+        for predicted_element, original_element in zip(predicted_elements, original_elements)
+    ], dtype=bool)
+
+    placeholder_similarity = unique_ratio_pairs(
+        [element.input_placeholder for element in predicted_elements],
+        [element.input_placeholder for element in original_elements],
+    )
+    block_similarity = block_similarity_pairs(predicted_elements, original_elements)
+    visual_similarity = np.zeros(len(predicted_elements))
+    same_type_pairs = np.nonzero(same_type)[0]
+    visual_similarity[same_type_pairs] = visual_similarity_pairs(
+        [predicted_elements[k] for k in same_type_pairs],
+        [original_elements[k] for k in same_type_pairs],
+    )
+    similarity = placeholder_similarity * 0.5 + block_similarity * 0.3 + visual_similarity * 0.2
+    return np.where(same_type, similarity, 0.0)
+
+
 def create_cost_matrix(predicted_elements, original_elements):
-    n = len(predicted_elements)
-    m = len(original_elements)
-    cost_matrix = np.zeros((n, m))
-    for i in range(n):
-        for j in range(m):
-            cost_matrix[i][j] = -calculate_cost(predicted_elements[i], original_elements[j])
-    return cost_matrix
+    return -create_similarity_matrix(predicted_elements, original_elements)
 
 
 def calculate_input_matching_similarity(predicted_elements, original_elements):
     try:
-        cost_matrix = create_cost_matrix(predicted_elements, original_elements)
-        row_ind, col_ind = linear_sum_assignment(cost_matrix)
-        similarity_sum = 0
-        for i , j in zip(row_ind, col_ind):
-            similarity_sum += calculate_cost(predicted_elements[i], original_elements[j])
+        _, _, similarities = assign_elements(
+            predicted_elements,
+            original_elements,
+            create_similarity_matrix,
+            create_similarity_pairs,
+            candidate_key=lambda element: element.input_placeholder,
+        )
+        similarity_sum = similarities.sum()
         
         total_count = max(len(predicted_elements), len(original_elements))
         if total_count == 0:
@@ -49,4 +89,3 @@ def calculate_input_matching_similarity(predicted_elements, original_elements):
     except Exception as e:
         bt.logging.error(f"Error calculating input matching score: {e}")
         return 0
-
@@ -1,11 +1,13 @@
-import numpy as np
-from scipy.optimize import linear_sum_assignment
-
-from webgenie.rewards.visual_reward.common.extract_html_elements import HTMLElement, extract_html_elements
+from webgenie.rewards.visual_reward.common.assignment import assign_elements
+from webgenie.rewards.visual_reward.common.extract_html_elements import HTMLElement
 from webgenie.rewards.visual_reward.common.similarity import (
     calculate_text_similarity,
     calculate_block_similarity,
-    calculate_color_similarity,
+    block_similarity_matrix,
+    block_similarity_pairs,
+    color_similarity_pairs,
+    text_similarity_matrix,
+    text_similarity_pairs,
 )
 
 
@@ -15,37 +17,57 @@ def calculate_cost(predicted_element: HTMLElement, original_element: HTMLElement
     return text_similarity * 0.8 + block_similarity * 0.2
 
 
+def create_similarity_matrices(predicted_elements, original_elements):
+    text_similarity = text_similarity_matrix(
+        [element.text for element in predicted_elements],
+        [element.text for element in original_elements],
+    )
+    block_similarity = block_similarity_matrix(predicted_elements, original_elements)
+    return text_similarity, block_similarity
+
+
+def create_similarity_matrix(predicted_elements, original_elements):
+    text_similarity, block_similarity = create_similarity_matrices(predicted_elements, original_elements)
+    return text_similarity * 0.8 + block_similarity * 0.2
+
+
+def create_similarity_pairs(predicted_elements, original_elements):
+    text_similarity = text_similarity_pairs(
+        [element.text for element in predicted_elements],
+        [element.text for element in original_elements],
+    )
+    block_similarity = block_similarity_pairs(predicted_elements, original_elements)
+    return text_similarity * 0.8 + block_similarity * 0.2
+
+
 def create_cost_matrix(predicted_elements, original_elements):
-    n = len(predicted_elements)
-    m = len(original_elements)
-    cost_matrix = np.zeros((n, m))
-    for i in range(n):
-        for j in range(m):
-            cost_matrix[i][j] = -calculate_cost(predicted_elements[i], original_elements[j])
-    return cost_matrix
+    return -create_similarity_matrix(predicted_elements, original_elements)
 
 
 def calculate_text_matching_similarity(predicted_elements, original_elements):
-    cost_matrix = create_cost_matrix(predicted_elements, original_elements)
-    row_ind, col_ind = linear_sum_assignment(cost_matrix)
-    
-    match_count = 0
-    text_similarity_sum = 0
-    block_similarity_sum = 0
-    color_similarity_sum = 0
-
-    for i , j in zip(row_ind, col_ind):
-        text_similarity = calculate_text_similarity(predicted_elements[i], original_elements[j])
-        if text_similarity < 0.5:
-            continue
-        
-        block_similarity = calculate_block_similarity(predicted_elements[i], original_elements[j])
-        color_similarity = calculate_color_similarity(predicted_elements[i], original_elements[j])
-        
-        match_count += 1
-        text_similarity_sum += text_similarity
-        block_similarity_sum += block_similarity
-        color_similarity_sum += color_similarity
+    row_ind, col_ind, _ = assign_elements(
+        predicted_elements,
+        original_elements,
+        create_similarity_matrix,
+        create_similarity_pairs,
+        candidate_key=lambda element: element.text,
+    )
+    matched_predicted_elements = [predicted_elements[i] for i in row_ind]
+    matched_original_elements = [original_elements[j] for j in col_ind]
+    text_similarity = text_similarity_pairs(
+        [element.text for element in matched_predicted_elements],
+        [element.text for element in matched_original_elements],
+    )
+
+    # Only the pairs with similar texts count as matches
+    matched = text_similarity >= 0.5
+    matched_predicted_elements = [element for element, is_matched in zip(matched_predicted_elements, matched) if is_matched]
+    matched_original_elements = [element for element, is_matched in zip(matched_original_elements, matched) if is_matched]
+    match_count = len(matched_predicted_elements)
+
+    text_similarity_sum = text_similarity[matched].sum()
+    block_similarity_sum = block_similarity_pairs(matched_predicted_elements, matched_original_elements).sum()
+    color_similarity_sum = color_similarity_pairs(matched_predicted_elements, matched_original_elements).sum()
 
     total_count = len(predicted_elements) + len(original_elements) - match_count
     if total_count == 0:
@@ -55,4 +77,4 @@ def calculate_text_matching_similarity(predicted_elements, original_elements):
     block_similarity_score = block_similarity_sum / total_count
     color_similarity_score = color_similarity_sum / total_count
     
-    return text_similarity_score * 0.5 + block_similarity_score * 0.3 + color_similarity_score * 0.2
\ No newline at end of file
+    return text_similarity_score * 0.5 + block_similarity_score * 0.3 + color_similarity_score * 0.2
@@ -4,105 +4,166 @@
 import bittensor as bt
 import os
 import asyncio
-import multiprocessing
+import itertools
 import numpy as np
 import shutil
 import uuid
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
-from webgenie.constants import WORK_DIR, NUMBER_OF_CONCURRENT_WORKERS
+from webgenie.constants import (
+    WORK_DIR,
+    NUMBER_OF_CONCURRENT_WORKERS,
+    SOLUTION_SCORING_TIMEOUT,
+    VISUAL_PREFILTER,
+    VISUAL_SCORING_GROUP_SIZE,
+)
 from webgenie.rewards.reward import Reward
-from webgenie.rewards.visual_reward.common.browser import start_browser, stop_browser
+from webgenie.rewards.scoring_pool import map_in_scoring_pool
+from webgenie.rewards.visual_reward.common.browser import run_in_worker_loop
+from webgenie.rewards.visual_reward.common.prefilter import prefilter_renders
+from webgenie.rewards.visual_reward.common.render_session import render_html_files
 from webgenie.rewards.visual_reward.high_level_matching_score import high_level_matching_score
 from webgenie.rewards.visual_reward.low_level_matching_score import low_level_matching_score
 from webgenie.tasks import Task, ImageTask, Solution
 
 
-class VisualReward(Reward):
-    def __init__(self):
-        pass
-
-    async def reward_worker(self, task: Task, solutions: List[Solution], current_work_dir: str) -> np.ndarray:
-        await start_browser()
-        
-        original_html_path = f"{current_work_dir}/original_{uuid.uuid4()}.html"
+async def calculate_visual_scores(task_id: str, ground_truth_html: str, htmls: List[str]) -> np.ndarray:
+    """
+    Score the htmls against the ground truth html, in a scoring worker.
+    """
+    timestamp = datetime.now().strftime("%Y_%m_%d_%H_%M")
+    current_work_dir = f"{WORK_DIR}/task_{timestamp}_{task_id}_{uuid.uuid4()}"
+    os.makedirs(current_work_dir, exist_ok=True)
+    try:
+        original_html_path = f"{current_work_dir}/original.html"
         with open(original_html_path, "w") as f:
-            f.write(task.ground_truth_html)
+            f.write(ground_truth_html)
 
         miner_html_paths = []
-        for solution in solutions:
-            path = f"{current_work_dir}/miner{solution.miner_uid}_{uuid.uuid4()}.html"
+        for i, html in enumerate(htmls):
+            path = f"{current_work_dir}/miner_{i}.html"
             with open(path, "w") as f:
-                f.write(solution.html)
+                f.write(html)
             miner_html_paths.append(path)
+
+        # Each html is loaded once in its own tab, every visual metric reuses its render.
+        # Only the ground truth is cached on disk, the other workers scoring the task need it.
+        renders = await render_html_files(
+            [original_html_path] + miner_html_paths,
+            persist=[True] + [False] * len(miner_html_paths),
+        )
+    finally:
+        # Clean up work directory and its contents
         try:
-            high_level_scores = await high_level_matching_score(miner_html_paths, original_html_path)
-        except Exception as e:
-            bt.logging.error(f"Error in high_level_matching_score: {e}")
-            high_level_scores = np.zeros(len(miner_html_paths))
-        try:
-            low_level_scores = await low_level_matching_score(miner_html_paths, original_html_path)
+            shutil.rmtree(current_work_dir)
         except Exception as e:
-            bt.logging.error(f"Error in low_level_matching_score: {e}")
-            low_level_scores = np.zeros(len(miner_html_paths))
-        
-        bt.logging.debug(f"High level visual scores: {high_level_scores}")
-        bt.logging.debug(f"Low level visual scores: {low_level_scores}")
-
-        scores = high_level_scores * 0.3 + low_level_scores * 0.7
-        await stop_browser()
+            bt.logging.warning(f"Error cleaning up work directory: {e}")
+    original_render = renders[0]
+    miner_renders = renders[1:]
+
+    # Clearly broken solutions score 0 from a cheap look at their screenshot,
+    # only the plausible ones go through the full visual metrics
+    scores = np.zeros(len(miner_renders))
+    plausible = np.ones(len(miner_renders), dtype=bool)
+    if VISUAL_PREFILTER:
+        plausible = prefilter_renders(miner_renders, original_render)
+    miner_renders = [render for render, keep in zip(miner_renders, plausible) if keep]
+    if not miner_renders:
         return scores
+
+    try:
+        high_level_scores = high_level_matching_score(miner_renders, original_render)
+    except Exception as e:
+        bt.logging.error(f"Error in high_level_matching_score: {e}")
+        high_level_scores = np.zeros(len(miner_renders))
+    try:
+        low_level_scores = low_level_matching_score(miner_renders, original_render)
+    except Exception as e:
+        bt.logging.error(f"Error in low_level_matching_score: {e}")
+        low_level_scores = np.zeros(len(miner_renders))
     
-    def sync_reward_worker(self, task: Task, solutions: List[Solution], current_work_dir: str) -> np.ndarray:
-        try:
-            # Timeout of 2 hours for visual reward processing
-            VISUAL_REWARD_TIMEOUT = 60 * 60 * 2 # 2 hours
-            
-            # Run the async reward worker with timeout
-            return asyncio.run(
-                asyncio.wait_for(
-                    self.reward_worker(task, solutions, current_work_dir),
-                    timeout=VISUAL_REWARD_TIMEOUT
-                )
+    bt.logging.debug(f"High level visual scores: {high_level_scores}")
+    bt.logging.debug(f"Low level visual scores: {low_level_scores}")
+
+    scores[plausible] = high_level_scores * 0.3 + low_level_scores * 0.7
+    return scores
+
+
+def score_visual_job(task_id: str, ground_truth_html: str, htmls: List[str], timeout: float = SOLUTION_SCORING_TIMEOUT) -> Optional[List[float]]:
+    """
+    Scoring pool job of the visual reward for a small group of solutions, it only carries the task id and html texts.
+    The solutions of the group render in parallel tabs and their screenshots are encoded in one clip batch.
+    The ground truth is rendered once per worker and then comes from the render cache.
+    Returns None when the group timed out or failed.
+    """
+    try:
+        # Run on the worker's long-lived loop, so the browser pool is reused across jobs
+        scores = run_in_worker_loop(
+            asyncio.wait_for(
+                calculate_visual_scores(task_id, ground_truth_html, htmls),
+                timeout=timeout
             )
-        except Exception as e:
-            bt.logging.error(f"Error in sync_reward_worker: {e}")
-            return [0] * len(solutions)
+        )
+        return [float(score) for score in scores]
+    except asyncio.TimeoutError:
+        bt.logging.error(f"Timed out scoring {len(htmls)} solutions of task {task_id} after {timeout}s")
+        return None
+    except Exception as e:
+        bt.logging.error(f"Error in score_visual_job: {e}")
+        return None
+
+
+def scoring_groups(htmls: List[str], max_group_size: int = VISUAL_SCORING_GROUP_SIZE) -> List[List[str]]:
+    """
+    Split the htmls into groups of at most `max_group_size`, small enough to keep every scoring worker busy.
+    """
+    group_size = max(1, min(max_group_size, -(-len(htmls) // NUMBER_OF_CONCURRENT_WORKERS)))
+    return [htmls[i:i + group_size] for i in range(0, len(htmls), group_size)]
+
+
+class VisualReward(Reward):
+    def __init__(self):
+        pass
 
     async def reward(self, task: Task, solutions: List[Solution]) -> np.ndarray:
         if not isinstance(task, ImageTask):
             raise ValueError(f"Task is not a ImageTask: {type(task)}")
 
         bt.logging.info(f"Rewarding image task in visual reward")
+        bt.logging.info(f"The number of concurrent workers: {NUMBER_OF_CONCURRENT_WORKERS}")
 
-        timestamp = datetime.now().strftime("%Y_%m_%d_%H_%M")
-        current_work_dir = f"{WORK_DIR}/task_{timestamp}_{task.task_id}"
-        os.makedirs(current_work_dir, exist_ok=True)
+        # One job per small group of solutions, so the group shares the tabs and the clip batches of its worker.
+        # The warm scoring workers only receive the task id and the html texts.
+        groups = scoring_groups([solution.html for solution in solutions])
+        scores = await map_in_scoring_pool(
+            score_visual_job,
+            [(task.task_id, task.ground_truth_html, htmls) for htmls in groups],
+            default=None,
+        )
 
-        bt.logging.info(f"The number of concurrent workers: {NUMBER_OF_CONCURRENT_WORKERS}")
-        # Use ProcessPoolExecutor for parallel processing
-        with multiprocessing.Pool(processes=NUMBER_OF_CONCURRENT_WORKERS) as pool:
-            # Convert solutions into chunks for parallel processing
-            chunk_size = max(1, len(solutions) // NUMBER_OF_CONCURRENT_WORKERS)
-            solution_chunks = [solutions[i:i + chunk_size] for i in range(0, len(solutions), chunk_size)]
-            
-            # Create partial tasks for each chunk
-            futures = []
-            for chunk in solution_chunks:
-                future = pool.apply_async(self.sync_reward_worker, args=(task, chunk, current_work_dir))
-                futures.append(future)
-            
-            # Gather all results
-            chunk_scores = []
-            for future in futures:
-                chunk_scores.extend(future.get())
-                
-            scores = np.array(chunk_scores)
-        # Clean up work directory and its contents
-        try:
-            shutil.rmtree(current_work_dir)
-        except Exception as e:
-            bt.logging.warning(f"Error cleaning up work directory: {e}")
-        
-        return scores
+        # A slow or broken page fails its whole group, the solutions of failed groups are
+        # scored again one per job, so only the solutions failing on their own score 0
+        failed_groups = [
+            index
+            for index, (htmls, group_scores) in enumerate(zip(groups, scores))
+            if group_scores is None and len(htmls) > 1
+        ]
+        if failed_groups:
+            bt.logging.warning(f"Scoring the solutions of {len(failed_groups)} failed groups one by one")
+            single_scores = iter(await map_in_scoring_pool(
+                score_visual_job,
+                [(task.task_id, task.ground_truth_html, [html]) for index in failed_groups for html in groups[index]],
+                default=None,
+            ))
+            for index in failed_groups:
+                scores[index] = [
+                    job_scores[0] if job_scores is not None else 0
+                    for job_scores in itertools.islice(single_scores, len(groups[index]))
+                ]
+
+        return np.array([
+            score
+            for htmls, group_scores in zip(groups, scores)
+            for score in (group_scores if group_scores is not None else [0] * len(htmls))
+        ], dtype=np.float64)
@@ -3,6 +3,7 @@ import numpy as np
 import hashlib
 import random
 from typing import Tuple, List
+from PIL import Image
 
 from webgenie.tasks.metric_types import (
     ACCURACY_METRIC_NAME, 
@@ -12,11 +13,10 @@ from webgenie.tasks.metric_types import (
 from webgenie.tasks.task_generator import TaskGenerator
 from webgenie.constants import IMAGE_TASK_TIMEOUT, GROUND_TRUTH_HTML_LOAD_TIME
 from webgenie.helpers.htmls import (
-    html_to_screenshot, 
     preprocess_html, 
     is_empty_html,
 )
-from webgenie.helpers.images import base64_to_image
+from webgenie.helpers.images import pil_image_to_base64
 from webgenie.protocol import WebgenieImageSynapse
 from webgenie.tasks.solution import Solution
 from webgenie.tasks.task import Task, ImageTask
@@ -31,6 +31,7 @@ from webgenie.datasets import (
     HuggingfaceDataset,
     CentralDataset,
 )
+from webgenie.rewards.visual_reward.common.render_session import render_html
 
 class ImageTaskGenerator(TaskGenerator):    
     def __init__(self):
@@ -64,10 +65,17 @@ class ImageTaskGenerator(TaskGenerator):
         if is_empty_html(ground_truth_html):
             raise ValueError("Empty ground truth html")
         
-        base64_image = await html_to_screenshot(ground_truth_html, page_load_time=GROUND_TRUTH_HTML_LOAD_TIME)   
-        # Check image dimensions ratio
-        image = base64_to_image(base64_image)
-        width, height = image.size
+        # The render is cached on disk before the task is sent, so the scoring workers of the
+        # visual reward read the ground truth from the cache instead of rendering it again
+        ground_truth_render = await render_html(
+            ground_truth_html,
+            ready_timeout=GROUND_TRUTH_HTML_LOAD_TIME,
+            persist=True,
+        )
+        base64_image = pil_image_to_base64(Image.fromarray(ground_truth_render.screenshot))
+        # Check image dimensions ratio, using the height of the whole page as the screenshot may be truncated
+        height, width = ground_truth_render.screenshot.shape[:2]
+        height = max(height, ground_truth_render.page_height)
         aspect_ratio = height / width
         if aspect_ratio > 7:  # If height is more than 7x the width
             raise ValueError(f"Image aspect ratio too extreme: {aspect_ratio:.2f}. Height should not exceed 7x width.")
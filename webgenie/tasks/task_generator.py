@@ -1,4 +1,5 @@
 import bittensor as bt
+import asyncio
 import numpy as np
 from typing import List, Tuple
 
@@ -14,9 +15,26 @@ class TaskGenerator:
     async def generate_task(self, **kwargs) -> Tuple[Task, bt.Synapse]:
         pass
     
-    async def calculate_scores(self, task: Task, solutions: List[Solution]) -> dict[str, np.ndarray]:
-        scores: dict[str, np.ndarray] = {}
-        for metric_name, reward_model in self.metrics.items():
-            reward_scores = await reward_model.reward(task, solutions)
-            scores[metric_name] = reward_scores
-        return scores
+    async def calculate_scores(self, task: Task, solutions: List[Solution], metric_names: List[str] = None) -> dict[str, np.ndarray]:
+        """
+        Calculate the scores of the metrics in `metric_names`, all of them by default.
+        The metrics run concurrently, their heavy work shares the workers of the scoring pool.
+        The metrics which are not needed score 0 and are not run.
+        """
+        if metric_names is None:
+            metric_names = list(self.metrics.keys())
+        needed_metric_names = [metric_name for metric_name in self.metrics if metric_name in metric_names]
+        skipped_metric_names = [metric_name for metric_name in self.metrics if metric_name not in metric_names]
+        if skipped_metric_names:
+            bt.logging.info(f"Skipping metrics {skipped_metric_names}, they are not needed")
+
+        reward_scores = await asyncio.gather(*[
+            self.metrics[metric_name].reward(task, solutions)
+            for metric_name in needed_metric_names
+        ])
+        scores: dict[str, np.ndarray] = {
+            metric_name: np.zeros(len(solutions))
+            for metric_name in skipped_metric_names
+        }
+        scores.update(zip(needed_metric_names, reward_scores))
+        return {metric_name: scores[metric_name] for metric_name in self.metrics}